@@ -4,21 +4,42 @@ from tools.place_search_tool import LocationInfoTool
 from tools.currency_converter_tool import CurrencyConverterTool
 from tools.arithematic_operations_tool import ArithematicOperationsTool
 from tools.expense_calculator_tool import CalculatorTool
+from tools.destination_research_tool import DestinationResearchTool
+from Agent.history import HistoryCompactor, content_text
 from langgraph.graph import StateGraph, MessagesState, START, END
 from typing import Any, Dict, Optional, TypedDict
-from langchain_core.messages import AIMessage
+from langchain_core.messages import AIMessage, SystemMessage, ToolMessage
 from langgraph.prebuilt import ToolNode, tools_condition
-from langgraph.checkpoint.memory import MemorySaver
-from prompt_library.prompt import SYSTEM_PROMPT
-import json
+from prompt_library.prompt import FINALIZE_PROMPT, SYSTEM_PROMPT
+from utils.checkpointer import build_checkpointer
+from utils.client_registry import ClientRegistry
+from utils.config_loader import get_config
+from utils.concurrency import upstream_limit
+from exception.exceptions import ServiceOverloadedError
+from utils.resilience import config_budget, deadline_scope
+from utils.structured_output import parse_structured_output
+from utils.telemetry import span, traced
+import asyncio
 import re
 import logging
 
 logger = logging.getLogger(__name__)
 
+DEFAULT_AGENT_SETTINGS = {"max_iterations": 12, "finalize_margin": 20}
+
+TOOLS_SKIPPED = "Skipped: this request has run out of time. Answer with the information already gathered."
+OUT_OF_TIME = "I ran out of time while researching your trip. Please try again, or ask about a shorter or more specific plan."
+
+# Hallucinated tool-call markup and provider error echoes that make the model copy them
+MALFORMED_CONTENT = re.compile(r"<function|tool_use_failed|failed_generation")
+
 class AgentState(MessagesState):
     structured: Optional[Dict[str, Any]]
-    api_keys: Optional[Dict[str, str]]
+    answer: Optional[str]
+    # Sanitizer verdict per message id (True = keep), so each message is checked once per thread
+    sanitized: Optional[Dict[str, bool]]
+    # Agent steps taken for the current request; reset to 0 by each new request's input
+    iterations: Optional[int]
 
 from langchain_core.runnables import RunnableConfig
 
@@ -32,40 +53,95 @@ class GraphBuilder():
         self.location_tools = LocationInfoTool()
         self.arithmetic_tools = ArithematicOperationsTool()
         self.expense_tools = CalculatorTool()
+        self.research_tools = DestinationResearchTool(self.location_tools, self.weather_tools)
         
         self.tools.extend([
+            *self.research_tools.research_tools_list,
             *self.weather_tools.weather_tools_list,
             *self.location_tools.place_search_tools_list,
             *self.arithmetic_tools.calculater_tools_list,
             *self.currency_tools.currency_tools_list,
             *self.expense_tools.calculator_tool_list
         ])
+        for tool in self.tools:
+            # Per-tool timings for /metrics; search and weather tools tag provider and cache hit/miss
+            tool.coroutine = traced("tool", tool.name)(tool.coroutine)
         
-        # Using parallel_tool_calls=False for higher reliability with Groq/Llama
+        # Tool-bound LLMs for user-provided keys, reused across turns and requests
+        llm_registry_cfg = (get_config().get("client_registry") or {}).get("llm") or {}
+        self.byok_llms = ClientRegistry(
+            maxsize=llm_registry_cfg.get("max_entries", 32),
+            ttl=llm_registry_cfg.get("ttl", 1800),
+            name="byok_llms",
+        )
+
         if self.llm:
-            self.llm_with_tools = self.llm.bind_tools(self.tools, parallel_tool_calls=False)
+            self.llm_with_tools = self._bind_tools(self.llm)
         else:
             self.llm_with_tools = None
             logger.warning("GraphBuilder initialized without a default LLM. Requests must provide their own API keys.")
         self.system_prompt = SYSTEM_PROMPT
+        # Keeps per-turn prompts within config.yaml `history.token_budget`
+        self.history = HistoryCompactor.from_config()
+        agent_cfg = {**DEFAULT_AGENT_SETTINGS, **(get_config().get("agent") or {})}
+        self.max_iterations = max(1, agent_cfg["max_iterations"])
+        self.finalize_margin = agent_cfg["finalize_margin"]
+        self.tool_node = ToolNode(tools=self.tools)
+
+    @property
+    def recursion_limit(self) -> int:
+        """LangGraph step cap: every agent step but the last may be followed by a tools step."""
+        return 2 * self.max_iterations + 1
+
+    def _bind_tools(self, llm):
+        # Using parallel_tool_calls=False for higher reliability with Groq/Llama
+        return llm.bind_tools(self.tools, parallel_tool_calls=False)
 
+    @traced("node", "agent")
     async def agent_function(self, state: AgentState, config: RunnableConfig) -> Dict[str, Any]:
         """
         Processes the current state, invokes the LLM with tools, 
         and extracts any structured JSON payload.
+
+        On the request's last allowed step, or once its deadline is within
+        `finalize_margin` seconds, the model is told to answer with what it
+        has and any tool calls it still makes are dropped.
         """
         input_messages = state.get('messages', [])
+        iterations = (state.get('iterations') or 0) + 1
+        remaining = config_budget(config)
+        finalize = iterations >= self.max_iterations or (remaining is not None and remaining <= self.finalize_margin)
+        system_prompt = self.system_prompt
+        if finalize:
+            logger.info(
+                "Finalizing thread %s at step %d (%s s left)", config.get("configurable", {}).get("thread_id"),
+                iterations, "unbounded" if remaining is None else f"{remaining:.1f}",
+            )
+            system_prompt = SystemMessage(content=self.system_prompt.content + FINALIZE_PROMPT)
         
         # --- HISTORY SANITIZATION ---
-        # Filter out any message containing hallucinated tags to prevent 'copycat' errors
-        messages = [self.system_prompt]
+        # Filter out any message containing hallucinated tags to prevent 'copycat' errors.
+        # Verdicts are kept in state, so only messages added since the last turn are scanned.
+        sanitized = dict(state.get('sanitized') or {})
+        history = []
         for msg in input_messages:
-            content = getattr(msg, 'content', "")
-            if isinstance(content, str):
-                if "<function" in content or "tool_use_failed" in content or "failed_generation" in content:
+            keep = sanitized.get(msg.id) if msg.id else None
+            if keep is None:
+                keep = not MALFORMED_CONTENT.search(content_text(getattr(msg, 'content', "")))
+                if not keep:
                     logger.info("Sanitizing history: removing message with suspected malformed content")
-                    continue
-            messages.append(msg)
+                if msg.id:
+                    sanitized[msg.id] = keep
+            if keep:
+                history.append(msg)
+
+        # --- HISTORY COMPACTION ---
+        messages, usage = self.history.compact(system_prompt, history)
+        logger.info(
+            "Prompt tokens for thread %s: %d before compaction, %d after (%d turns, %d dropped, %d recent tool outputs digested)",
+            config.get("configurable", {}).get("thread_id"),
+            usage["before"], usage["after"], usage["turns"], usage["dropped_turns"], usage["digested_recent"],
+        )
 
         try:
             # BYOK: Check for custom LLM keys
@@ -92,45 +168,77 @@ class GraphBuilder():
                 logger.info("Using user-provided DeepSeek API key for this request")
 
             if target_key:
-                custom_llm = self.model_loader.load_llm(api_key=target_key)
-                current_llm = custom_llm.bind_tools(self.tools, parallel_tool_calls=False)
-
-            # Invoke LLM asynchronously
-            response = await current_llm.ainvoke(messages)
-            
-            # Robust content extraction
-            content = getattr(response, 'content', "")
-            text = str(content) if not isinstance(content, list) else " ".join([str(c) for c in content])
+                current_llm = self.byok_llms.get_or_create(
+                    self.model_loader.model_provider,
+                    target_key,
+                    lambda: self._bind_tools(self.model_loader.load_llm(api_key=target_key)),
+                )
 
-            # Look for JSON block
-            structured = None
-            try:
-                json_blocks = re.findall(r"```json\s*(\{.*?\})\s*```", text, re.DOTALL)
-                if json_blocks:
-                    structured = json.loads(json_blocks[-1])
-            except Exception:
-                pass
+            # Invoke LLM asynchronously, within the provider's concurrency/rate budget; the final
+            # answer always gets at least `finalize_margin` seconds
+            timeout = None if remaining is None else max(remaining, self.finalize_margin)
+            async with upstream_limit("llm"):
+                with span("upstream", "llm", provider=self.model_loader.model_provider):
+                    response = await asyncio.wait_for(current_llm.ainvoke(messages), timeout=timeout)
 
-            return {"messages": [response], "structured": structured} if structured else {"messages": [response]}
+            if finalize and (response.tool_calls or getattr(response, "invalid_tool_calls", None)):
+                logger.warning("Dropping %d tool call(s) requested after the step/time budget ran out", len(response.tool_calls))
+                additional_kwargs = {k: v for k, v in response.additional_kwargs.items() if k != "tool_calls"}
+                response = response.model_copy(update={"tool_calls": [], "invalid_tool_calls": [], "additional_kwargs": additional_kwargs})
+                if not content_text(response.content).strip():
+                    response = response.model_copy(update={"content": OUT_OF_TIME})
+            
+            # Split off the trailing ```json itinerary block (validated against ItineraryPayload);
+            # `answer` is the cleaned Markdown the API returns as-is
+            answer, structured = parse_structured_output(content_text(getattr(response, 'content', "")))
+            return {"messages": [response], "structured": structured, "answer": answer, "sanitized": sanitized, "iterations": iterations}
 
+        except ServiceOverloadedError:
+            # Shed load all the way up to the client (503 + Retry-After)
+            raise
+        except asyncio.TimeoutError:
+            logger.warning("LLM call for thread %s ran past the request deadline", config.get("configurable", {}).get("thread_id"))
+            error_msg = AIMessage(content=OUT_OF_TIME, response_metadata={"agent_error": True})
+            return {"messages": [error_msg], "structured": None, "answer": OUT_OF_TIME, "sanitized": sanitized, "iterations": iterations}
         except Exception as e:
             logger.exception("Agent node execution failed: %s", e)
             friendly_msg = "I encountered a technical issue while processing your request. Please try again or rephrase your query."
             if "400" in str(e) and "tool_use_failed" in str(e):
                  friendly_msg = "I had trouble using my research tools correctly. I'm resetting my approach."
             
-            error_msg = AIMessage(content=friendly_msg)
-            return {"messages": [error_msg]}
+            # Flagged so callers (e.g. the response cache) can tell a failed turn from an answer
+            error_msg = AIMessage(content=friendly_msg, response_metadata={"agent_error": True})
+            return {"messages": [error_msg], "structured": None, "answer": friendly_msg, "sanitized": sanitized, "iterations": iterations}
+
+    @traced("node", "tools")
+    async def tools_function(self, state: AgentState, config: RunnableConfig) -> Dict[str, Any]:
+        """
+        Runs the requested tools within the request deadline. Tools still
+        running when it passes are cancelled, and their calls are answered
+        with TOOLS_SKIPPED so the agent finalizes with what it has.
+        """
+        remaining = config_budget(config)
+        if remaining is None or remaining > 0:
+            # Outbound calls made by the tools read the deadline from this scope (utils/resilience.py)
+            with deadline_scope(remaining):
+                try:
+                    return await asyncio.wait_for(self.tool_node.ainvoke(state, config), timeout=remaining)
+                except asyncio.TimeoutError:
+                    pass
+        tool_calls = state["messages"][-1].tool_calls
+        logger.warning("Request deadline reached; skipping %d tool call(s)", len(tool_calls))
+        return {"messages": [ToolMessage(content=TOOLS_SKIPPED, name=call["name"], tool_call_id=call["id"]) for call in tool_calls]}
     
     def build_graph(self):
-        memory = MemorySaver()
+        # Durable, multi-worker conversation store (config.yaml `checkpointer`)
+        self.checkpointer = build_checkpointer()
         graph_builder = StateGraph(AgentState)
         graph_builder.add_node("agent", self.agent_function)
-        graph_builder.add_node("tools", ToolNode(tools=self.tools))
+        graph_builder.add_node("tools", self.tools_function)
         graph_builder.add_edge(START, "agent")
         graph_builder.add_conditional_edges("agent", tools_condition)
         graph_builder.add_edge("tools", "agent")
-        return graph_builder.compile(checkpointer=memory)
+        return graph_builder.compile(checkpointer=self.checkpointer)
         
     def __call__(self):
         return self.build_graph()
\ No newline at end of file
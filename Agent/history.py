@@ -0,0 +1,160 @@
+import json
+import logging
+from typing import Any, Dict, List, Sequence, Tuple
+
+from langchain_core.messages import BaseMessage, HumanMessage, ToolMessage
+
+from utils.config_loader import get_config
+
+try:
+    import tiktoken
+except ImportError:
+    tiktoken = None
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_HISTORY_SETTINGS = {
+    "token_budget": 12000,
+    "keep_recent_turns": 2,
+    "tool_digest_chars": 400,
+    "encoding": "cl100k_base",
+}
+
+# Rough per-message overhead (role, separators) added by chat templates
+MESSAGE_OVERHEAD_TOKENS = 4
+
+
+def _encoder(name: str):
+    if tiktoken is None:
+        return None
+    try:
+        return tiktoken.get_encoding(name)
+    except Exception:
+        logger.warning(f"tiktoken encoding '{name}' unavailable, estimating tokens from characters")
+        return None
+
+
+def content_text(content: Any) -> str:
+    """Text of a message's content, whether a plain string or a list of multimodal parts."""
+    if isinstance(content, list):
+        return " ".join(part.get("text", "") if isinstance(part, dict) else str(part) for part in content)
+    return content if isinstance(content, str) else str(content or "")
+
+
+def message_text(msg: BaseMessage) -> str:
+    """Flatten message content plus any tool-call arguments to text."""
+    text = content_text(getattr(msg, "content", ""))
+    tool_calls = getattr(msg, "tool_calls", None)
+    if tool_calls:
+        text += json.dumps([{"name": c.get("name"), "args": c.get("args")} for c in tool_calls], default=str)
+    return text
+
+
+class HistoryCompactor:
+    """
+    Keeps the prompt sent to the LLM within a token budget.
+
+    The last `keep_recent_turns` user turns (including the one in progress)
+    are sent verbatim when they fit. Older tool outputs are replaced by a
+    short digest, and if the prompt is still over budget the oldest turns
+    are dropped whole, so AI tool calls always stay paired with their
+    ToolMessages. If the recent turns alone are over budget, their tool
+    outputs are digested too, oldest first, sparing the latest batch the
+    model is about to act on. The checkpointed thread itself is never modified.
+    """
+
+    def __init__(self, token_budget: int = 12000, keep_recent_turns: int = 2, tool_digest_chars: int = 400,
+                 encoding: str = "cl100k_base"):
+        self.token_budget = token_budget
+        self.keep_recent_turns = max(1, keep_recent_turns)
+        self.tool_digest_chars = tool_digest_chars
+        self._encoder = _encoder(encoding)
+
+    @classmethod
+    def from_config(cls) -> "HistoryCompactor":
+        cfg = {**DEFAULT_HISTORY_SETTINGS, **(get_config().get("history") or {})}
+        return cls(
+            token_budget=cfg["token_budget"],
+            keep_recent_turns=cfg["keep_recent_turns"],
+            tool_digest_chars=cfg["tool_digest_chars"],
+            encoding=cfg["encoding"],
+        )
+
+    def count_tokens(self, messages: Sequence[BaseMessage]) -> int:
+        """Local estimate of prompt tokens (tiktoken when installed, else ~4 characters per token)."""
+        total = 0
+        for msg in messages:
+            text = message_text(msg)
+            total += MESSAGE_OVERHEAD_TOKENS
+            total += len(self._encoder.encode(text, disallowed_special=())) if self._encoder else len(text) // 4 + 1
+        return total
+
+    @staticmethod
+    def split_turns(messages: Sequence[BaseMessage]) -> List[List[BaseMessage]]:
+        """Group messages into turns; a turn starts at the first user message after a non-user message."""
+        turns: List[List[BaseMessage]] = []
+        for msg in messages:
+            starts_turn = isinstance(msg, HumanMessage) and (not turns or not isinstance(turns[-1][-1], HumanMessage))
+            if starts_turn or not turns:
+                turns.append([])
+            turns[-1].append(msg)
+        return turns
+
+    def digest(self, msg: ToolMessage) -> ToolMessage:
+        text = " ".join(message_text(msg).split())
+        if len(text) <= self.tool_digest_chars:
+            return msg
+        digest = f"{text[:self.tool_digest_chars]} ... [earlier tool output compacted, {len(text)} chars]"
+        return msg.model_copy(update={"content": digest})
+
+    def compact(self, system: BaseMessage, messages: Sequence[BaseMessage]) -> Tuple[List[BaseMessage], Dict[str, Any]]:
+        """Return the prompt (system message first) and before/after token counts."""
+        before = self.count_tokens([system, *messages])
+        turns = self.split_turns(messages)
+        older, recent = turns[:-self.keep_recent_turns], turns[-self.keep_recent_turns:]
+
+        older = [[self.digest(m) if isinstance(m, ToolMessage) else m for m in turn] for turn in older]
+        budget = self.token_budget - self.count_tokens([system, *(m for turn in recent for m in turn)])
+        sizes = [self.count_tokens(turn) for turn in older]
+        dropped = 0
+        while older and sum(sizes) > budget:
+            older.pop(0)
+            sizes.pop(0)
+            dropped += 1
+
+        recent_messages = [m for turn in recent for m in turn]
+        digested = 0
+        if budget < 0:
+            recent_messages, digested = self._digest_recent(recent_messages, -budget)
+
+        prompt = [system, *(m for turn in older for m in turn), *recent_messages]
+        # A thread must not open with orphaned tool results
+        while len(prompt) > 1 and isinstance(prompt[1], ToolMessage):
+            prompt.pop(1)
+        after = self.count_tokens(prompt)
+        if after > self.token_budget:
+            logger.warning(f"Prompt is {after} tokens after compaction, over the {self.token_budget} token budget")
+        stats = {"before": before, "after": after, "turns": len(turns), "dropped_turns": dropped,
+                 "digested_recent": digested}
+        return prompt, stats
+
+    def _digest_recent(self, messages: List[BaseMessage], excess: int) -> Tuple[List[BaseMessage], int]:
+        """Digest tool outputs oldest first until `excess` tokens are saved, keeping the trailing batch verbatim."""
+        latest = len(messages)
+        while latest > 0 and isinstance(messages[latest - 1], ToolMessage):
+            latest -= 1
+        messages = list(messages)
+        digested = 0
+        for i in range(latest):
+            if excess <= 0:
+                break
+            msg = messages[i]
+            if not isinstance(msg, ToolMessage):
+                continue
+            compacted = self.digest(msg)
+            if compacted is not msg:
+                excess -= self.count_tokens([msg]) - self.count_tokens([compacted])
+                messages[i] = compacted
+                digested += 1
+        return messages, digested
+
@@ -0,0 +1,51 @@
+"""
+Per-call cost of building search clients vs. reusing them from the registry.
+
+    python -m benchmarks.client_construction --iterations 500
+
+No network calls are made: this measures only the construction/lookup
+overhead that used to sit on the hot path of every search tool call.
+"""
+import argparse
+import time
+
+from benchmarks.stats import summarize
+from utils.place_info_search import search_clients, serpapi_wrapper_class, tavily_search_class
+
+
+def _time(fn, iterations: int):
+    samples = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - start)
+    return samples
+
+
+def _report(label: str, samples):
+    # Construction costs are in the microsecond range, so report in µs
+    summary = summarize(samples)
+    print(
+        f"{label:<32} n={summary['n']:<5} mean={summary['mean_ms'] * 1000:8.2f}us "
+        f"p50={summary['p50_ms'] * 1000:8.2f}us p99={summary['p99_ms'] * 1000:8.2f}us"
+    )
+
+
+def main(iterations: int):
+    key = "bench-key"
+    TavilySearch, SerpAPIWrapper = tavily_search_class(), serpapi_wrapper_class()
+    build_tavily = lambda: TavilySearch(tavily_api_key=key, topic="general", search_depth="advanced")
+    _report("tavily: construct per call", _time(build_tavily, iterations))
+    _report("tavily: registry lookup", _time(lambda: search_clients.get_or_create("tavily", key, build_tavily), iterations))
+
+    if SerpAPIWrapper is not None:
+        build_serp = lambda: SerpAPIWrapper(serpapi_api_key=key)
+        _report("serpapi: construct per call", _time(build_serp, iterations))
+        _report("serpapi: registry lookup", _time(lambda: search_clients.get_or_create("serpapi", key, build_serp), iterations))
+    print(search_clients.stats())
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--iterations", type=int, default=500)
+    main(parser.parse_args().iterations)
@@ -0,0 +1,138 @@
+"""
+Cold-start profile of the backend: import cost of `main` and time until
+`GET /` answers in a fresh server process.
+
+    python -m benchmarks.cold_start --runs 5
+    python -m benchmarks.cold_start --module Agent.agentic_workflow --top 30
+
+Import time comes from `python -X importtime` in a fresh interpreter per
+run; the slowest modules and top-level packages (cumulative time, median of
+the runs) show what a cold start pays for. Time-to-healthy starts uvicorn
+and polls `GET /` until it returns 200, so it includes the startup hooks
+(graph compilation, checkpointer, HTTP client). The command exits non-zero
+if the median time-to-healthy is over `--target`, so it can gate a deploy.
+"""
+import argparse
+import os
+import re
+import socket
+import statistics
+import subprocess
+import sys
+import time
+from collections import defaultdict
+from typing import Dict, List, Tuple
+
+import httpx
+
+from benchmarks.stats import format_summary, summarize
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Seconds from process start to a 200 from GET / (Render's free plan starts a cold instance per wake-up)
+DEFAULT_HEALTHY_TARGET = 5.0
+
+_IMPORTTIME = re.compile(r"^import time:\s+(\d+)\s+\|\s+(\d+)\s+\|( *)(\S+)$")
+
+
+def profile_imports(module: str) -> Tuple[float, Dict[str, Tuple[int, int]]]:
+    """Wall time of `import module` in a fresh interpreter, and {module: (self_us, cumulative_us)}."""
+    start = time.perf_counter()
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=ROOT, capture_output=True, text=True,
+    )
+    wall = time.perf_counter() - start
+    if proc.returncode != 0:
+        sys.exit(f"import {module} failed:\n{proc.stderr[-2000:]}")
+    modules = {}
+    for line in proc.stderr.splitlines():
+        match = _IMPORTTIME.match(line)
+        if match:
+            modules[match.group(4)] = (int(match.group(1)), int(match.group(2)))
+    return wall, modules
+
+
+def package_totals(modules: Dict[str, Tuple[int, int]]) -> Dict[str, int]:
+    """Self time summed per top-level package (e.g. all of langchain_core.*), in microseconds."""
+    totals: Dict[str, int] = defaultdict(int)
+    for name, (self_us, _) in modules.items():
+        totals[name.partition(".")[0]] += self_us
+    return totals
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def time_to_healthy(timeout: float) -> float:
+    """Seconds from spawning `uvicorn main:app` until GET / returns 200."""
+    port = _free_port()
+    start = time.perf_counter()
+    proc = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "main:app", "--host", "127.0.0.1", "--port", str(port), "--log-level", "warning"],
+        cwd=ROOT, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    try:
+        while time.perf_counter() - start < timeout:
+            if proc.poll() is not None:
+                sys.exit(f"Server exited with code {proc.returncode} before becoming healthy")
+            try:
+                if httpx.get(f"http://127.0.0.1:{port}/", timeout=1.0).status_code == 200:
+                    return time.perf_counter() - start
+            except httpx.TransportError:
+                pass
+            time.sleep(0.02)
+        sys.exit(f"Server not healthy after {timeout:.0f}s")
+    finally:
+        proc.terminate()
+        try:
+            proc.wait(timeout=10)
+        except subprocess.TimeoutExpired:
+            proc.kill()
+
+
+def _median_by_name(runs: List[Dict[str, float]]) -> Dict[str, float]:
+    names = set().union(*runs)
+    return {name: statistics.median(run.get(name, 0) for run in runs) for name in names}
+
+
+def main(runs: int, module: str, top: int, target: float, timeout: float, skip_server: bool) -> int:
+    walls, cumulative, packages = [], [], []
+    for _ in range(runs):
+        wall, modules = profile_imports(module)
+        walls.append(wall)
+        cumulative.append({name: cum for name, (_, cum) in modules.items()})
+        packages.append(package_totals(modules))
+
+    print(format_summary(f"interpreter + import {module}", summarize(walls)))
+    print(f"\nSlowest imports (cumulative, median of {runs} runs):")
+    for name, us in sorted(_median_by_name(cumulative).items(), key=lambda item: -item[1])[:top]:
+        print(f"  {us / 1000:9.1f}ms  {name}")
+    print("\nSelf time by top-level package:")
+    for name, us in sorted(_median_by_name(packages).items(), key=lambda item: -item[1])[:top]:
+        print(f"  {us / 1000:9.1f}ms  {name}")
+
+    if skip_server:
+        return 0
+    healthy = [time_to_healthy(timeout) for _ in range(runs)]
+    print()
+    print(format_summary("time to healthy (GET /)", summarize(healthy)))
+    p50 = statistics.median(healthy)
+    verdict = "within" if p50 <= target else "OVER"
+    print(f"p50 {p50:.2f}s is {verdict} the {target:.2f}s target")
+    return 0 if p50 <= target else 1
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--module", default="main", help="module whose import is profiled")
+    parser.add_argument("--top", type=int, default=20, help="modules and packages listed")
+    parser.add_argument("--target", type=float, default=DEFAULT_HEALTHY_TARGET, help="time-to-healthy budget (s)")
+    parser.add_argument("--timeout", type=float, default=120, help="give up on a server start after this long (s)")
+    parser.add_argument("--imports-only", action="store_true", help="skip the time-to-healthy measurement")
+    args = parser.parse_args()
+    sys.exit(main(args.runs, args.module, args.top, args.target, args.timeout, args.imports_only))
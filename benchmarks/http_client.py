@@ -0,0 +1,75 @@
+"""
+Per-call client vs. shared pooled client, against a local stub upstream.
+
+    python -m benchmarks.http_client --requests 300 --concurrency 10 --connect-latency 0.02
+
+"Before" reproduces the old pattern (a new httpx.AsyncClient per tool call),
+"after" goes through utils.weather_info with the shared client from
+utils.http_client. `--connect-latency` charges each new TCP connection a
+handshake delay, since a plain local socket has none of the TLS cost.
+"""
+import argparse
+import asyncio
+import time
+
+import httpx
+
+from benchmarks.stats import format_summary, summarize
+from benchmarks.stub_server import StubServer
+from utils.http_client import close_http_client
+from utils.weather_info import WeatherInfoTool
+
+
+def _weather_route(path, params):
+    return 200, {"name": params.get("q", "Paris"), "main": {"temp": 18.2, "humidity": 60}, "weather": [{"description": "clear sky"}]}
+
+
+async def _run(call, total: int, concurrency: int):
+    samples = []
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def one(i):
+        async with semaphore:
+            start = time.perf_counter()
+            await call(i)
+            samples.append(time.perf_counter() - start)
+
+    await asyncio.gather(*(one(i) for i in range(total)))
+    return samples
+
+
+async def main(total: int, concurrency: int, latency: float, connect_latency: float):
+    with StubServer({"/data/2.5/": _weather_route}, latency=latency, connect_latency=connect_latency) as stub:
+        base_url = f"{stub.url}/data/2.5/"
+
+        async def per_call_client(i):
+            async with httpx.AsyncClient() as client:
+                response = await client.get(f"{base_url}weather", params={"q": f"city-{i % 20}", "appid": "bench"})
+                response.raise_for_status()
+
+        service = WeatherInfoTool(api_key="bench")
+        service.base_url = base_url
+
+        async def shared_client(i):
+            result = await service.get_weather(f"city-{i % 20}")
+            assert "error" not in result, result
+
+        before_conns = stub.connections
+        before = await _run(per_call_client, total, concurrency)
+        mid_conns = stub.connections
+        after = await _run(shared_client, total, concurrency)
+        after_conns = stub.connections
+        await close_http_client()
+
+    print(format_summary("before: client per call", summarize(before)), f"connections={mid_conns - before_conns}")
+    print(format_summary("after: shared pooled client", summarize(after)), f"connections={after_conns - mid_conns}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=300)
+    parser.add_argument("--concurrency", type=int, default=10)
+    parser.add_argument("--latency", type=float, default=0.005, help="server processing time per request (s)")
+    parser.add_argument("--connect-latency", type=float, default=0.02, help="handshake cost per new connection (s)")
+    args = parser.parse_args()
+    asyncio.run(main(args.requests, args.concurrency, args.latency, args.connect_latency))
@@ -0,0 +1,326 @@
+"""
+Offline end-to-end latency benchmark: concurrent /query calls against the
+real compiled graph, with a scripted chat model and local stub upstreams.
+
+    python -m benchmarks.replay --requests 40 --concurrency 8 --llm-latency 0.3 --api-latency 0.05
+    python -m benchmarks.replay --record THREAD_ID > benchmarks/scenarios/my_trip.json
+
+The chat model replays a scenario (benchmarks/scenarios/*.json): a list of
+steps, each either tool calls or the final answer, with "{place}" filled in
+from the query. OpenWeatherMap, exchangerate-api, SerpAPI and Tavily are
+served by StubServers (utils.http_client.upstream_url is pointed at them
+through <NAME>_BASE_URL), each with its own injected latency. Nothing
+leaves the machine.
+
+Reported: /query latency and throughput, agent/tools node timings and agent
+steps per plan. Upstream limits and admission control come from
+config.yaml; `--unthrottled` lifts them to measure the code path alone.
+Conversations go to an in-memory checkpointer and a temporary search cache.
+"""
+import argparse
+import asyncio
+import functools
+import json
+import os
+import re
+import sys
+import tempfile
+import time
+import uuid
+from collections import defaultdict
+from typing import Any, Dict, List, Optional
+
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage, BaseMessage, HumanMessage
+from langchain_core.outputs import ChatGeneration, ChatResult
+
+from benchmarks.stats import format_summary, summarize
+from benchmarks.stub_server import StubServer
+from utils.config_loader import get_env
+
+DEFAULT_SCENARIO = os.path.join(os.path.dirname(os.path.abspath(__file__)), "scenarios", "trip_plan.json")
+PLACE = "{place}"
+
+
+def _fill(value: Any, place: str) -> Any:
+    """Substitute the place name into every string of a scenario step."""
+    if isinstance(value, str):
+        return value.replace(PLACE, place)
+    if isinstance(value, list):
+        return [_fill(item, place) for item in value]
+    if isinstance(value, dict):
+        return {key: _fill(item, place) for key, item in value.items()}
+    return value
+
+
+class ScriptedChatModel(BaseChatModel):
+    """
+    Chat model that replays a scenario instead of calling a provider.
+
+    The step is derived from the conversation itself (AI messages since the
+    last user message), so one instance can serve any number of concurrent
+    threads. Steps past the end of the script repeat the last one.
+    """
+
+    steps: List[Dict[str, Any]]
+    query_pattern: str
+    latency: float = 0.0
+
+    @property
+    def _llm_type(self) -> str:
+        return "scripted"
+
+    def bind_tools(self, tools, **kwargs) -> "ScriptedChatModel":
+        return self
+
+    def _next_message(self, messages: List[BaseMessage]) -> AIMessage:
+        last_user = max((i for i, m in enumerate(messages) if isinstance(m, HumanMessage)), default=0)
+        step_index = sum(isinstance(m, AIMessage) for m in messages[last_user + 1:])
+        step = self.steps[min(step_index, len(self.steps) - 1)]
+
+        match = re.search(self.query_pattern, str(messages[last_user].content)) if messages else None
+        step = _fill(step, match.group("place") if match else "Replayville")
+        tool_calls = [{**call, "id": f"call_{uuid.uuid4().hex[:12]}"} for call in step.get("tool_calls", [])]
+        return AIMessage(content=step.get("content", ""), tool_calls=tool_calls, id=f"run-{uuid.uuid4().hex}")
+
+    def _generate(self, messages, stop=None, run_manager=None, **kwargs) -> ChatResult:
+        time.sleep(self.latency)
+        return ChatResult(generations=[ChatGeneration(message=self._next_message(messages))])
+
+    async def _agenerate(self, messages, stop=None, run_manager=None, **kwargs) -> ChatResult:
+        await asyncio.sleep(self.latency)
+        return ChatResult(generations=[ChatGeneration(message=self._next_message(messages))])
+
+
+def load_scenario(path: str) -> Dict[str, Any]:
+    with open(path) as f:
+        scenario = json.load(f)
+    if PLACE not in scenario["query"]:
+        raise ValueError(f"Scenario query must contain {PLACE}: {scenario['query']!r}")
+    return scenario
+
+
+def query_pattern(query_template: str) -> str:
+    before, after = (re.escape(part) for part in query_template.split(PLACE, 1))
+    return f"{before}(?P<place>.+?){after}$"
+
+
+def script_from_messages(messages: List[BaseMessage], place: Optional[str] = None) -> Dict[str, Any]:
+    """Turn the last turn of a recorded conversation into a scenario, templating `place` if given."""
+    last_user = max(i for i, m in enumerate(messages) if isinstance(m, HumanMessage))
+    template = lambda value: json.loads(json.dumps(value).replace(place, PLACE)) if place else value
+    steps = []
+    for msg in messages[last_user + 1:]:
+        if not isinstance(msg, AIMessage):
+            continue
+        if msg.tool_calls:
+            steps.append({"tool_calls": [{"name": c["name"], "args": template(c["args"])} for c in msg.tool_calls]})
+        else:
+            steps.append({"content": template(msg.content)})
+    return {"query": template(messages[last_user].content), "steps": steps}
+
+
+# --- Stub upstreams -------------------------------------------------------------
+
+def _weather_route(path, params):
+    city = params.get("q", "Replayville")
+    if path.endswith("/forecast"):
+        entries = [
+            {"dt_txt": f"2026-12-0{day} {hour:02d}:00:00", "main": {"temp": 18 + day + hour / 12},
+             "weather": [{"description": "scattered clouds"}]}
+            for day in range(1, 6) for hour in range(0, 24, 3)
+        ]
+        return 200, {"city": {"name": city}, "list": entries}
+    return 200, {"name": city, "main": {"temp": 24.5, "humidity": 62}, "weather": [{"description": "clear sky"}], "wind": {"speed": 3.1}}
+
+
+RATES = {"USD": 1.0, "INR": 83.0, "EUR": 0.92, "GBP": 0.79, "JPY": 151.0, "THB": 36.0}
+
+
+def _exchange_route(path, params):
+    return 200, ({"rates": RATES} if path.startswith("/latest") else {"result": "success", "conversion_rates": RATES})
+
+
+def _search_results(query: str) -> List[Dict[str, str]]:
+    slug = re.sub(r"[^a-z0-9]+", "-", query.lower()).strip("-")[:40]
+    return [
+        {"title": f"Result {i} for {query}", "link": f"https://example.com/{slug}/{i}",
+         "url": f"https://example.com/{slug}/{i}", "snippet": f"Snippet {i} about {query}.", "content": f"About {query}."}
+        for i in range(1, 6)
+    ]
+
+
+def _serpapi_route(path, params):
+    return 200, {"search_metadata": {"status": "Success"}, "organic_results": _search_results(params.get("q", ""))}
+
+
+def _tavily_route(path, params):
+    return 200, {"query": "stub", "results": _search_results("tavily stub"), "response_time": 0.01}
+
+
+# --- Instrumentation ------------------------------------------------------------
+
+class NodeTimer:
+    """Wall time per graph node and agent steps per thread."""
+
+    def __init__(self):
+        self.samples: Dict[str, List[float]] = defaultdict(list)
+        self.steps: Dict[str, int] = defaultdict(int)
+
+    def wrap(self, name: str, node):
+        @functools.wraps(node)
+        async def timed(state, config):
+            start = time.perf_counter()
+            try:
+                return await node(state, config)
+            finally:
+                self.samples[name].append(time.perf_counter() - start)
+                if name == "agent":
+                    self.steps[config["configurable"]["thread_id"]] += 1
+        return timed
+
+
+def _unthrottle(main_module) -> None:
+    from utils import concurrency
+    from utils.concurrency import AdmissionController, UpstreamLimiter
+
+    main_module.admission = AdmissionController(max_active=10 ** 6, max_queue=10 ** 6)
+    for name in ("llm", "serpapi", "tavily", "openweathermap", "exchange_rates"):
+        concurrency._upstreams[name] = UpstreamLimiter(name, max_concurrent=10 ** 6)
+
+
+async def run(args) -> None:
+    scenario = load_scenario(args.scenario)
+    get_env("MODEL_PROVIDER")  # load .env first so the stub settings below take precedence
+
+    with StubServer({"/data/2.5/": _weather_route}, latency=args.weather_latency) as weather, \
+            StubServer({"/v6/": _exchange_route, "/latest": _exchange_route}, latency=args.exchange_latency) as exchange, \
+            StubServer({"/search": _serpapi_route}, latency=args.search_latency) as serpapi, \
+            StubServer({"/search": _tavily_route}, latency=args.search_latency) as tavily, \
+            tempfile.TemporaryDirectory() as tmp:
+        os.environ.update({
+            "OPENWEATHERMAP_BASE_URL": f"{weather.url}/data/2.5",
+            "EXCHANGERATE_API_BASE_URL": f"{exchange.url}/v6",
+            "EXCHANGERATE_HOST_BASE_URL": exchange.url,
+            "SERPAPI_BASE_URL": serpapi.url,
+            "TAVILY_BASE_URL": tavily.url,
+            "WEATHER_API_KEY": "bench",
+            "EXCHANGE_API_KEY": "bench",
+            "TAVILY_API_KEY": "bench",
+        })
+        if args.search == "serpapi":
+            os.environ["SERPAPI_API_KEY"] = "bench"
+        else:
+            os.environ.pop("SERPAPI_API_KEY", None)
+
+        import httpx
+        from langgraph.checkpoint.memory import MemorySaver
+
+        import main as server
+        from Agent import agentic_workflow
+        from utils.search_cache import SearchCache
+
+        agentic_workflow.build_checkpointer = MemorySaver
+        if args.unthrottled:
+            _unthrottle(server)
+
+        timer = NodeTimer()
+        builder = agentic_workflow.GraphBuilder(model_provider=get_env("MODEL_PROVIDER", "groq"))
+        builder.agent_function = timer.wrap("agent", builder.agent_function)
+        builder.tools_function = timer.wrap("tools", builder.tools_function)
+        model = ScriptedChatModel(steps=scenario["steps"], query_pattern=query_pattern(scenario["query"]), latency=args.llm_latency)
+        builder.llm, builder.llm_with_tools = model, builder._bind_tools(model)
+        cache = builder.location_tools.search_cache
+        builder.location_tools.search_cache = SearchCache(
+            os.path.join(tmp, "search_cache.sqlite3"), max_entries=cache.max_entries, lease_timeout=cache.lease_timeout, ttls=cache.ttls
+        )
+        server.app.state.graph_builder = builder
+        server.app.state.react_app = builder()
+
+        transport = httpx.ASGITransport(app=server.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=None) as client:
+            latencies, errors = [], []
+            semaphore = asyncio.Semaphore(args.concurrency)
+
+            async def one(i: int) -> None:
+                body = {
+                    "query": scenario["query"].replace(PLACE, f"Replayville {i % args.places}"),
+                    "thread_id": f"bench-{uuid.uuid4().hex}",
+                    "cache_control": None if args.use_cache else "no-cache",
+                }
+                async with semaphore:
+                    start = time.perf_counter()
+                    response = await client.post("/query", json=body)
+                    elapsed = time.perf_counter() - start
+                if response.status_code == 200 and response.json().get("structured"):
+                    latencies.append(elapsed)
+                else:
+                    errors.append(f"{response.status_code}: {response.text[:200]}")
+
+            for i in range(args.warmup):
+                await one(i)
+            latencies.clear()
+            timer.samples.clear()
+            timer.steps.clear()
+
+            started = time.perf_counter()
+            await asyncio.gather(*(one(i) for i in range(args.requests)))
+            wall = time.perf_counter() - started
+
+        await builder.currency_tools.currency_service.stop_background_refresh()
+
+    steps = list(timer.steps.values())
+    print(f"scenario: {os.path.basename(args.scenario)} ({len(scenario['steps'])} steps), search via {args.search}, "
+          f"{args.requests} requests at concurrency {args.concurrency}{' (unthrottled)' if args.unthrottled else ''}")
+    print(format_summary("/query", summarize(latencies)))
+    print(format_summary("agent node", summarize(timer.samples["agent"])))
+    print(format_summary("tools node", summarize(timer.samples["tools"])))
+    print(f"throughput: {len(latencies) / wall:.2f} plans/s over {wall:.2f}s; "
+          f"agent steps per plan: mean {sum(steps) / max(1, len(steps)):.2f}, max {max(steps, default=0)}")
+    print(f"upstream requests: weather={weather.requests} exchange={exchange.requests} "
+          f"serpapi={serpapi.requests} tavily={tavily.requests}")
+    if errors:
+        print(f"{len(errors)} failed requests, first: {errors[0]}")
+
+
+async def record(thread_id: str, place: Optional[str]) -> None:
+    """Print the last turn of a stored conversation as a scenario."""
+    from utils.checkpointer import build_checkpointer, close_checkpointer
+
+    checkpointer = build_checkpointer()
+    try:
+        saved = await checkpointer.aget_tuple({"configurable": {"thread_id": thread_id}})
+    finally:
+        await close_checkpointer(checkpointer)
+    if saved is None:
+        sys.exit(f"No stored conversation for thread {thread_id!r}")
+    messages = saved.checkpoint["channel_values"]["messages"]
+    print(json.dumps(script_from_messages(messages, place), indent=2, ensure_ascii=False))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--scenario", default=DEFAULT_SCENARIO)
+    parser.add_argument("--requests", type=int, default=40)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--warmup", type=int, default=2, help="sequential requests excluded from the results")
+    parser.add_argument("--places", type=int, default=10, help="distinct destinations (affects upstream cache hits)")
+    parser.add_argument("--search", choices=("serpapi", "tavily"), default="serpapi")
+    parser.add_argument("--llm-latency", type=float, default=0.3, help="seconds per chat model call")
+    parser.add_argument("--api-latency", type=float, default=0.05, help="default latency of every stub upstream (s)")
+    parser.add_argument("--weather-latency", type=float)
+    parser.add_argument("--exchange-latency", type=float)
+    parser.add_argument("--search-latency", type=float)
+    parser.add_argument("--use-cache", action="store_true", help="let the /query response cache serve repeats")
+    parser.add_argument("--unthrottled", action="store_true", help="lift admission control and upstream limits")
+    parser.add_argument("--record", metavar="THREAD_ID", help="print a stored conversation as a scenario and exit")
+    parser.add_argument("--place", help="with --record: destination name to template as {place}")
+    args = parser.parse_args()
+    for name in ("weather_latency", "exchange_latency", "search_latency"):
+        if getattr(args, name) is None:
+            setattr(args, name, args.api_latency)
+
+    if args.record:
+        asyncio.run(record(args.record, args.place))
+    else:
+        asyncio.run(run(args))
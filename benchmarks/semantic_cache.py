@@ -0,0 +1,88 @@
+"""
+Hit rate and lookup latency of the semantic response cache on a synthetic corpus.
+
+    python -m benchmarks.semantic_cache --destinations 200 --threshold 0.85
+
+The index is seeded with one phrasing per (destination, days) plan. It is
+then queried with:
+- paraphrases of seeded plans (should hit)
+- the same destinations with a different number of days, and
+  destinations that were never seeded (should miss; a hit is a false
+  positive).
+"""
+import argparse
+import random
+import time
+
+from benchmarks.stats import format_summary, summarize
+from utils.response_cache import trip_params
+from utils.semantic_cache import SemanticCache
+
+SEED_TEMPLATES = ["{days} day trip to {place}"]
+PARAPHRASES = [
+    "plan {days_word} days in {place}",
+    "{days} days in {place}",
+    "Plan a {days}-day trip to {place}.",
+    "I want to visit {place} for {days} days",
+    "{place} itinerary for {days} days please",
+    "{days_word} day {place} vacation",
+]
+DAYS_WORDS = {2: "two", 3: "three", 4: "four", 5: "five", 7: "seven"}
+SYLLABLES = ["ba", "li", "go", "ra", "ki", "to", "mi", "sa", "no", "vi", "la", "pu", "dan", "zor", "kel"]
+
+
+def make_places(count: int, rng: random.Random):
+    if count > len(SYLLABLES) ** 2 + len(SYLLABLES) ** 3:
+        raise ValueError(f"Cannot make {count} distinct destination names; use fewer destinations")
+    places = set()
+    while len(places) < count:
+        places.add("".join(rng.choice(SYLLABLES) for _ in range(rng.randint(2, 3))).title())
+    return sorted(places)
+
+
+def main(destinations: int, threshold: float, seed: int):
+    rng = random.Random(seed)
+    places = make_places(destinations * 2, rng)
+    seeded, unseen = places[:destinations], places[destinations:]
+    cache = SemanticCache(enabled=True, threshold=threshold, max_entries=destinations * len(DAYS_WORDS))
+    params = trip_params(2, "December", "INR", True, "groq")
+
+    plans = [(place, days) for place in seeded for days in rng.sample(sorted(DAYS_WORDS), 2)]
+    for place, days in plans:
+        cache.add(rng.choice(SEED_TEMPLATES).format(days=days, place=place), params, (place, days))
+
+    def query(place, days):
+        template = rng.choice(PARAPHRASES)
+        return template.format(days=days, days_word=DAYS_WORDS[days], place=place)
+
+    seeded_days = {}
+    for place, days in plans:
+        seeded_days.setdefault(place, set()).add(days)
+    positives = [(query(place, days), (place, days)) for place, days in plans]
+    negatives = [(query(place, next(d for d in DAYS_WORDS if d not in seeded_days[place])), None) for place in seeded]
+    negatives += [(query(place, rng.choice(sorted(DAYS_WORDS))), None) for place in unseen]
+
+    samples, hits, wrong, false_hits = [], 0, 0, 0
+    for text, expected in positives + negatives:
+        start = time.perf_counter()
+        match = cache.lookup(text, params)
+        samples.append(time.perf_counter() - start)
+        if expected is not None:
+            hits += match is not None and match[0] == expected
+            wrong += match is not None and match[0] != expected
+        else:
+            false_hits += match is not None
+
+    print(f"index: {len(cache)} entries in {cache.stats()['partitions']} partitions, threshold {threshold}")
+    print(f"paraphrase hit rate:  {hits / len(positives):6.1%} ({hits}/{len(positives)}, {wrong} wrong plan)")
+    print(f"false positive rate:  {false_hits / len(negatives):6.1%} ({false_hits}/{len(negatives)})")
+    print(format_summary("lookup latency", summarize(samples)))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--destinations", type=int, default=200)
+    parser.add_argument("--threshold", type=float, default=0.85)
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+    main(args.destinations, args.threshold, args.seed)
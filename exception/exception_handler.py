@@ -1,7 +1,7 @@
 import logging
 from fastapi import FastAPI, Request
 from fastapi.responses import JSONResponse
-from exception.exceptions import BaseAppException, ProviderAPIError
+from exception.exceptions import BaseAppException, ProviderAPIError, ServiceOverloadedError
 
 logger = logging.getLogger(__name__)
 
@@ -25,6 +25,16 @@ def register_exception_handlers(app: FastAPI):
             content={"error": f"Provider API Error: {exc.message}"}
         )
 
+    @app.exception_handler(ServiceOverloadedError)
+    async def service_overloaded_exception_handler(request: Request, exc: ServiceOverloadedError):
+        logger.warning(f"Service overloaded: {exc.message}")
+        # Load shedding is expected under pressure; tell clients when to come back instead of logging a traceback
+        return JSONResponse(
+            status_code=exc.status_code,
+            content={"error": exc.message},
+            headers={"Retry-After": str(exc.retry_after)}
+        )
+
     @app.exception_handler(Exception)
     async def general_exception_handler(request: Request, exc: Exception):
         logger.exception("Internal Server Error")
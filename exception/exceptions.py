@@ -19,3 +19,24 @@ class ConfigurationError(BaseAppException):
     """Raised when configuration issues (like missing API keys) are detected."""
     def __init__(self, message: str, status_code: int = 500):
         super().__init__(message, status_code)
+
+class ServiceOverloadedError(BaseAppException):
+    """Raised when admission control or an upstream limiter sheds load; clients should retry later."""
+    def __init__(self, message: str = "The service is busy right now. Please retry shortly.", status_code: int = 503, retry_after: int = 5):
+        super().__init__(message, status_code)
+        self.retry_after = retry_after
+
+class JobQueueFullError(ServiceOverloadedError):
+    """Raised when the background job pool cannot accept more work."""
+    def __init__(self, message: str = "Too many plans are being generated right now. Please retry shortly.", status_code: int = 503):
+        super().__init__(message, status_code)
+
+class UpstreamUnavailableError(BaseAppException):
+    """Raised when an upstream's circuit breaker is open and calls are short-circuited."""
+    def __init__(self, message: str, status_code: int = 503):
+        super().__init__(message, status_code)
+
+class DeadlineExceededError(BaseAppException):
+    """Raised when the request's time budget is spent before an operation could start."""
+    def __init__(self, message: str = "The request ran out of time.", status_code: int = 504):
+        super().__init__(message, status_code)
@@ -0,0 +1,37 @@
+"""
+Gunicorn settings for the backend:
+
+    gunicorn -c gunicorn.conf.py main:app
+
+The app is imported and the agent graph compiled once in the master
+(preload_app), then forked into the workers, which share those pages
+copy-on-write instead of each building their own. Anything bound to a
+process or event loop (HTTP client, SQLite connections, background tasks,
+the log listener) is created in each worker after the fork.
+"""
+import gc
+import os
+
+bind = f"0.0.0.0:{os.getenv('PORT', '10000')}"
+workers = int(os.getenv("WEB_CONCURRENCY", "4"))
+worker_class = "uvicorn.workers.UvicornWorker"
+preload_app = True
+
+
+def when_ready(server):
+    # Runs in the master after the preloaded app is imported and before any worker is forked
+    from main import init_graph
+
+    try:
+        init_graph()
+    except Exception:
+        server.log.exception("Graph warm-up in the master failed; workers will build it themselves")
+    # Keep the collector from touching (and un-sharing) the pages inherited from the master
+    gc.freeze()
+
+
+def post_worker_init(worker):
+    # The uvicorn worker re-installs its own log handlers after the preloaded app configured logging
+    from utils.logging_setup import capture_server_loggers
+
+    capture_server_loggers()
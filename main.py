@@ -2,33 +2,36 @@ import warnings
 warnings.filterwarnings("ignore", category=UserWarning, message='Field name "output_schema" in "TavilyResearch" shadows an attribute in parent "BaseTool"')
 warnings.filterwarnings("ignore", category=UserWarning, message='Field name "stream" in "TavilyResearch" shadows an attribute in parent "BaseTool"')
 
-from fastapi import FastAPI
-from pydantic import BaseModel
+from fastapi import FastAPI, Header, Request
+from pydantic import BaseModel, Field
 from typing import Optional
-import re
-import os
 import time
 import logging
 import json
-from dotenv import load_dotenv
-from fastapi.responses import JSONResponse, Response
+import contextlib
+import asyncio
+import threading
+import uuid
+from fastapi.responses import JSONResponse, Response, StreamingResponse
+from starlette.background import BackgroundTask
 
-from tools.place_search_tool import LocationInfoTool
 from Agent.agentic_workflow import GraphBuilder
-from exception.exceptions import ProviderAPIError
+from exception.exceptions import BaseAppException, ProviderAPIError
+from langchain_core.messages import AIMessage
+from utils.http_client import get_http_client, close_http_client, warm_up_connections
+from utils.config_loader import get_env
+from utils.checkpointer import close_checkpointer
+from utils.structured_output import JsonBlockFilter, split_trailing_json
+from utils.response_cache import ResponseCache, bypass_requested, response_cache_key, trip_params
+from utils.semantic_cache import SemanticCache
+from utils.jobs import JobManager
+from utils.concurrency import AdmissionController, upstream_stats
+from utils.resilience import resilience_settings, resilience_stats, with_deadline
+from utils.telemetry import span, telemetry
+from utils.logging_setup import bind_log_context, configure_logging, log_context
 
-load_dotenv()
-
-import logging
-
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-    handlers=[
-        logging.FileHandler("server_debug.log"),
-        logging.StreamHandler()
-    ]
-)
+# Log records are queued and written by a background thread, never on the event loop (config.yaml `logging`)
+configure_logging()
 logger = logging.getLogger(__name__)
 
 from exception.exception_handler import register_exception_handlers
@@ -36,6 +39,23 @@ from exception.exception_handler import register_exception_handlers
 app = FastAPI()
 register_exception_handlers(app)
 
+@app.middleware("http")
+async def bind_request_id(request: Request, call_next):
+    """Tag every log record for this request with its id (X-Request-ID if the client sent one)."""
+    request_id = request.headers.get("x-request-id") or uuid.uuid4().hex[:16]
+    with log_context(request_id=request_id):
+        response = await call_next(request)
+    response.headers["X-Request-ID"] = request_id
+    return response
+
+# Opt-in caches of first-turn answers (config.yaml `response_cache` / `semantic_cache`)
+response_cache = ResponseCache.from_config()
+semantic_cache = SemanticCache.from_config()
+# Background plan generation for POST /jobs (config.yaml `jobs`)
+job_manager = JobManager.from_config()
+# Bounded queue in front of interactive agent runs (config.yaml `concurrency.admission`)
+admission = AdmissionController.from_config()
+
 class QueryRequest(BaseModel):
     query: str
     num_travelers: Optional[int] = None
@@ -45,6 +65,10 @@ class QueryRequest(BaseModel):
     target_currency: Optional[str] = None
     include_web_results: Optional[bool] = False
     thread_id: Optional[str] = "default"
+    # "no-cache" skips the response cache, like the Cache-Control request header
+    cache_control: Optional[str] = None
+    # Seconds the agent may spend before answering with what it has; capped by config.yaml
+    time_budget: Optional[float] = Field(None, gt=0)
     # User-provided API keys (BYOK)
     google_api_key: Optional[str] = None
     groq_api_key: Optional[str] = None
@@ -54,97 +78,401 @@ class QueryRequest(BaseModel):
     exchange_api_key: Optional[str] = None
     serp_api_key: Optional[str] = None
 
+# Guards graph construction: the gunicorn master (preload_app), worker startup and requests may all ask for it
+_graph_lock = threading.Lock()
+
+def init_graph():
+    """
+    Build and compile the agent graph once per process and return it.
+
+    With gunicorn's preload_app the master calls this before forking (see
+    gunicorn.conf.py), so tool schemas and the compiled graph are shared
+    copy-on-write by the workers. Concurrent callers wait for the first
+    build instead of starting their own; a failed build is retried by the
+    next caller.
+    """
+    react_app = getattr(app.state, "react_app", None)
+    if react_app is not None:
+        return react_app
+    with _graph_lock:
+        if getattr(app.state, "react_app", None) is None:
+            provider = get_env("MODEL_PROVIDER", "google")
+            try:
+                graph_builder = GraphBuilder(model_provider=provider)
+                react_app = graph_builder()
+            except Exception as e:
+                app.state.graph_error = f"{type(e).__name__}: {e}"
+                raise
+            app.state.graph_builder = graph_builder
+            app.state.react_app = react_app
+            app.state.graph_error = None
+            logger.info(f"GraphBuilder initialized with provider: {provider}")
+    return app.state.react_app
+
+# Seconds before the warm-up task retries a failed graph build (doubling up to GRAPH_RETRY_MAX_DELAY)
+GRAPH_RETRY_DELAY = 5
+GRAPH_RETRY_MAX_DELAY = 60
+
+async def open_checkpointer():
+    checkpointer = getattr(getattr(app.state, "graph_builder", None), "checkpointer", None)
+    if hasattr(checkpointer, "setup"):
+        try:
+            await checkpointer.setup()
+        except Exception:
+            logger.exception("Checkpointer warm-up failed")
+
+async def warm_up():
+    """
+    Per-worker warm-up, after any fork: open the checkpointer store and
+    upstream connections, then keep retrying the graph build if startup
+    failed, since no request reaches a worker that /ready reports as not ready.
+    Failures are reported in app.state.warmup, never fatal.
+    """
+    start = time.perf_counter()
+    report = {"upstreams": {}}
+    try:
+        await open_checkpointer()
+        report["upstreams"] = await warm_up_connections()
+    except Exception as e:
+        logger.exception("Warm-up failed")
+        report["error"] = f"{type(e).__name__}: {e}"
+    finally:
+        report["seconds"] = round(time.perf_counter() - start, 3)
+        app.state.warmup = report
+        logger.info(f"Warm-up finished in {report['seconds']}s: {report['upstreams']}")
+
+    delay = GRAPH_RETRY_DELAY
+    while getattr(app.state, "react_app", None) is None:
+        await asyncio.sleep(delay)
+        try:
+            await asyncio.to_thread(init_graph)
+        except Exception as e:
+            logger.warning(f"Graph build retry failed, next attempt in {min(delay * 2, GRAPH_RETRY_MAX_DELAY)}s: {e}")
+            delay = min(delay * 2, GRAPH_RETRY_MAX_DELAY)
+        else:
+            app.state.graph_builder.currency_tools.currency_service.start_background_refresh()
+            await open_checkpointer()
+
 @app.on_event("startup")
 def startup_event():
     try:
-        provider = os.getenv("MODEL_PROVIDER", "google")
-        app.state.graph_builder = GraphBuilder(model_provider=provider)
-        app.state.react_app = app.state.graph_builder()
-        logger.info(f"GraphBuilder initialized with provider: {provider}")
+        init_graph()
     except Exception as e:
         logger.exception("Failed to initialize on startup")
 
-@app.post("/query")
-async def query_travel_agent(query: QueryRequest):
-    try:
-        react_app = getattr(app.state, "react_app", None)
-        if react_app is None:
-            provider = os.getenv("MODEL_PROVIDER", "google")
-            app.state.graph_builder = GraphBuilder(model_provider=provider)
-            react_app = app.state.graph_builder()
-
-        # BYOK: Collect keys from request
-        api_keys = {
-            "google_api_key": query.google_api_key,
-            "groq_api_key": query.groq_api_key,
-            "deepseek_api_key": query.deepseek_api_key,
-            "tavily_api_key": query.tavily_api_key,
-            "weather_api_key": query.weather_api_key,
-            "exchange_api_key": query.exchange_api_key,
-            "serp_api_key": query.serp_api_key
+@app.on_event("startup")
+async def startup_upstream_clients():
+    # Create the shared client on the server loop; it is reused by every tool call
+    get_http_client()
+    graph_builder = getattr(app.state, "graph_builder", None)
+    if graph_builder is not None:
+        graph_builder.currency_tools.currency_service.start_background_refresh()
+    # Runs in the background so the worker starts serving at once; /ready reports when it is done
+    app.state.warmup_task = asyncio.create_task(warm_up())
+
+@app.on_event("shutdown")
+async def shutdown_upstream_clients():
+    warmup_task = getattr(app.state, "warmup_task", None)
+    if warmup_task is not None and not warmup_task.done():
+        warmup_task.cancel()
+    await job_manager.shutdown()
+    graph_builder = getattr(app.state, "graph_builder", None)
+    if graph_builder is not None:
+        await graph_builder.currency_tools.currency_service.stop_background_refresh()
+        await close_checkpointer(getattr(graph_builder, "checkpointer", None))
+    await close_http_client()
+
+async def get_react_app():
+    """Return the compiled graph, building it (once, off the event loop) if startup failed to."""
+    react_app = getattr(app.state, "react_app", None)
+    if react_app is None:
+        react_app = await asyncio.to_thread(init_graph)
+    return react_app
+
+def build_graph_inputs(query: QueryRequest):
+    """Turn a QueryRequest into the graph input state and RunnableConfig."""
+    bind_log_context(thread_id=query.thread_id)
+    # BYOK: Collect keys from request
+    api_keys = {
+        "google_api_key": query.google_api_key,
+        "groq_api_key": query.groq_api_key,
+        "deepseek_api_key": query.deepseek_api_key,
+        "tavily_api_key": query.tavily_api_key,
+        "weather_api_key": query.weather_api_key,
+        "exchange_api_key": query.exchange_api_key,
+        "serp_api_key": query.serp_api_key
+    }
+
+    metadata = (
+        f"Trip Context: Travelers: {query.num_travelers}, "
+        f"Month: {query.travel_month if query.travel_month else 'any month'}, "
+        f"Preferred Currency: {query.target_currency if query.target_currency else 'USD'}."
+    )
+    if query.auto_convert:
+        metadata += " IMPORTANT: Please proactively convert all costs and budgets to the Preferred Currency using your tools."
+    # BYOK keys travel only in the RunnableConfig: every state channel is written to the checkpointer
+    messages = {"messages": [("user", metadata), ("user", query.query)], "iterations": 0}
+
+    # Persistence check
+    config = {
+        "configurable": {"thread_id": query.thread_id, "api_keys": api_keys},
+        # Backstop for the agent's own max_iterations cap
+        "recursion_limit": app.state.graph_builder.recursion_limit,
+    }
+    return messages, config
+
+def request_budget(query: QueryRequest, background: bool = False) -> float:
+    """Seconds this request may run: the client's `time_budget`, capped by the configured limit."""
+    limit = job_manager.run_timeout if background else resilience_settings()["request_budget"]
+    return min(query.time_budget, limit) if query.time_budget else limit
+
+def extract_answer(output) -> str:
+    """Pull the user-facing Markdown answer out of the final graph state."""
+    # --- ROBUST OUTPUT PARSING ---
+    final_output = ""
+    
+    # Handle dictionary responses (prevents the 'markdown' key error)
+    if isinstance(output, dict):
+        if "markdown" in output:
+            final_output = output["markdown"]
+        elif isinstance(output.get("structured"), dict) and output["structured"].get("markdown") \
+                and "full markdown" not in output["structured"]["markdown"]:
+            # Skip the payload's markdown if the LLM used the placeholder
+            final_output = output["structured"]["markdown"]
+        elif output.get("answer") is not None:
+            # Already split from its JSON block by the agent node
+            return output["answer"]
+        elif "messages" in output and len(output["messages"]) > 0:
+            final_output = output["messages"][-1].content
+        else:
+            final_output = str(output)
+    else:
+        final_output = str(output)
+        
+    # Ensure final_output is a string (handle case where content became a list)
+    if isinstance(final_output, list):
+         final_output = " ".join([str(item) for item in final_output])
+    elif not isinstance(final_output, str):
+         final_output = str(final_output)
+
+    # Remove any lingering machine-readable JSON block
+    return split_trailing_json(final_output)[0].strip()
+
+def build_response(output) -> dict:
+    """API payload for a finished run: the cleaned answer plus the validated itinerary, if any."""
+    structured = output.get("structured") if isinstance(output, dict) else None
+    return {"answer": extract_answer(output), "structured": structured}
+
+async def run_graph(react_app, messages, config, admit: bool = True):
+    """Invoke the graph, holding an admission slot unless the caller is already bounded (background jobs)."""
+    async with admission if admit else contextlib.nullcontext():
+        return await react_app.ainvoke(messages, config=config)
+
+async def cached_first_turn(react_app, query: QueryRequest, messages, config, admit: bool = True):
+    """
+    Serve a first-turn query from the exact or semantic response cache,
+    running the graph on a miss.
+
+    On a hit the thread is seeded with the cached exchange, so follow-up
+    questions see the same history as if the agent had run.
+    """
+    params = trip_params(
+        query.num_travelers, query.travel_month, query.target_currency,
+        query.auto_convert, app.state.graph_builder.model_loader.model_provider,
+    )
+    key = response_cache_key(query.query, params)
+
+    async def run():
+        output = await run_graph(react_app, messages, config, admit)
+        final = output["messages"][-1]
+        return {
+            **build_response(output),
+            "content": final.content,
+            "error": bool(final.response_metadata.get("agent_error")),
         }
 
-        metadata = (
-            f"Trip Context: Travelers: {query.num_travelers}, "
-            f"Month: {query.travel_month if query.travel_month else 'any month'}, "
-            f"Preferred Currency: {query.target_currency if query.target_currency else 'USD'}."
+    cached, source = response_cache.get(key), "exact"
+    if cached is None and semantic_cache.enabled:
+        match = semantic_cache.lookup(query.query, params)
+        if match is not None:
+            cached, similarity = match
+            source = f"semantic, similarity {similarity:.2f}"
+    if cached is None:
+        cached, hit = await response_cache.get_or_run(key, run, should_cache=lambda response: not response["error"])
+        if not hit and not cached["error"] and semantic_cache.enabled:
+            semantic_cache.add(query.query, params, cached)
+    else:
+        hit = True
+
+    if hit:
+        await react_app.aupdate_state(
+            config,
+            {**messages, "messages": [*messages["messages"], AIMessage(content=cached["content"])],
+             "answer": cached["answer"], "structured": cached["structured"]},
+            as_node="agent",
         )
-        if query.auto_convert:
-            metadata += " IMPORTANT: Please proactively convert all costs and budgets to the Preferred Currency using your tools."
-        messages = {"messages": [("user", metadata), ("user", query.query)], "api_keys": api_keys}
-        
-        # Persistence check
-        config = {"configurable": {"thread_id": query.thread_id, "api_keys": api_keys}}
+        logger.info(f"Response cache hit ({source}) for thread {query.thread_id}")
+    return {"answer": cached["answer"], "structured": cached["structured"], "cached": hit}
+
+async def answer_query(query: QueryRequest, cache_control: Optional[str] = None, admit: bool = True) -> dict:
+    """
+    Run (or serve from cache) one /query request and return its response payload.
+
+    Agent runs go through admission control unless `admit` is False; cache hits skip it.
+    """
+    try:
+        react_app = await get_react_app()
+        messages, config = build_graph_inputs(query)
+        # The deadline starts now, so time spent queueing for admission counts against it
+        config = with_deadline(config, request_budget(query, background=not admit))
+
+        if (response_cache.enabled or semantic_cache.enabled) and not bypass_requested(query.cache_control, cache_control):
+            state = await react_app.aget_state(config)
+            if not state.values.get("messages"):
+                return await cached_first_turn(react_app, query, messages, config, admit)
         
         # Invoke the graph asynchronously
-        output = await react_app.ainvoke(messages, config=config)
+        output = await run_graph(react_app, messages, config, admit)
         
-        # --- ROBUST OUTPUT PARSING ---
-        final_output = ""
-        
-        # Handle dictionary responses (prevents the 'markdown' key error)
-        if isinstance(output, dict):
-            if "markdown" in output:
-                final_output = output["markdown"]
-            elif "structured" in output and isinstance(output["structured"], dict):
-                start_fin = output["structured"].get("markdown", str(output))
-                if "... full markdown ..." in start_fin or "full markdown" in start_fin:
-                     # Fallback to message content if LLM used the placeholder
-                     if "messages" in output and len(output["messages"]) > 0:
-                        final_output = output["messages"][-1].content
-                     else:
-                        final_output = str(output)
-                else:
-                    final_output = start_fin
-            elif "messages" in output and len(output["messages"]) > 0:
-                final_output = output["messages"][-1].content
-            else:
-                final_output = str(output)
-        else:
-            final_output = str(output)
-            
-        # Ensure final_output is a string (handle case where content became a list)
-        if isinstance(final_output, list):
-             final_output = " ".join([str(item) for item in final_output])
-        elif not isinstance(final_output, str):
-             final_output = str(final_output)
-
-        # Remove any lingering machine-readable JSON blocks
-        final_output = re.sub(r"```json\s*[\s\S]*?```", "", final_output, flags=re.DOTALL).strip()
-        
-        # Provide both a cleaned `answer` for UI and a `raw` field for debugging
-        return {"answer": final_output}
+        # Provide both a cleaned `answer` for UI and the parsed `structured` itinerary
+        return build_response(output)
 
     except Exception as e:
         if "402" in str(e):
             raise ProviderAPIError(str(e), status_code=402)
         raise e
 
+@app.post("/query")
+async def query_travel_agent(query: QueryRequest, cache_control: Optional[str] = Header(None)):
+    # Tagged cache=hit/miss by the response caches
+    with span("request", "query"):
+        return await answer_query(query, cache_control)
+
+@app.post("/jobs", status_code=202)
+async def submit_travel_agent_job(query: QueryRequest, cache_control: Optional[str] = Header(None)):
+    """Start a /query run in the background and return its job id immediately."""
+    # The job pool bounds its own concurrency, so jobs don't take interactive admission slots
+    job_id = await job_manager.submit(lambda: answer_query(query, cache_control, admit=False), thread_id=query.thread_id)
+    return {"job_id": job_id, "status": "queued", "status_url": f"/jobs/{job_id}"}
+
+@app.get("/jobs/{job_id}")
+async def get_travel_agent_job(job_id: str, wait: float = 0):
+    """
+    Job status: queued, running, succeeded (with `result`, the /query payload)
+    or failed (with `error`). Pass `wait` to long-poll up to that many seconds.
+    """
+    job = await job_manager.wait(job_id, timeout=wait)
+    if job is None:
+        raise BaseAppException("Job not found or expired.", status_code=404)
+    return job
+
+def _chunk_text(content) -> str:
+    if isinstance(content, list):
+        return "".join(part.get("text", "") if isinstance(part, dict) else str(part) for part in content)
+    return content or ""
+
+async def stream_travel_agent_events(react_app, messages, config, release_admission):
+    """
+    Run the graph and yield NDJSON lines as it progresses (releasing, at the
+    end, the admission slot the endpoint took before responding):
+
+    - {"type": "tool_start" | "tool_end", "tool": name}
+    - {"type": "token", "content": text}   LLM tokens from the agent node
+    - {"type": "final", "answer": markdown, "structured": itinerary} same payload as /query
+    - {"type": "error", "error": message, "status_code": code}
+    """
+    def line(event: dict) -> str:
+        return json.dumps(event, ensure_ascii=False) + "\n"
+
+    try:
+        json_filter = JsonBlockFilter()
+        async for event in react_app.astream_events(messages, config=config, version="v2"):
+            kind = event["event"]
+            from_agent = event.get("metadata", {}).get("langgraph_node") == "agent"
+            if kind == "on_chat_model_start" and from_agent:
+                json_filter = JsonBlockFilter()
+            elif kind in ("on_chat_model_stream", "on_chat_model_end") and from_agent:
+                # The itinerary JSON block is delivered parsed in the final event, not as tokens
+                if kind == "on_chat_model_stream":
+                    text = json_filter.feed(_chunk_text(getattr(event["data"].get("chunk"), "content", "")))
+                else:
+                    text = json_filter.flush()
+                if text:
+                    yield line({"type": "token", "content": text})
+            elif kind in ("on_tool_start", "on_tool_end"):
+                yield line({"type": kind[3:], "tool": event["name"]})
+
+        state = await react_app.aget_state(config)
+        yield line({"type": "final", **build_response(state.values)})
+    except BaseAppException as e:
+        yield line({"type": "error", "error": e.message, "status_code": e.status_code})
+    except Exception as e:
+        logger.exception("Streaming query failed")
+        status_code = 402 if "402" in str(e) else 500
+        yield line({"type": "error", "error": str(e) if status_code == 402 else "An internal server error occurred.", "status_code": status_code})
+    finally:
+        await release_admission()
+
+@app.post("/query/stream")
+async def stream_travel_agent(query: QueryRequest):
+    """Streaming variant of /query: newline-delimited JSON progress events, tokens and the final answer."""
+    react_app = await get_react_app()
+    messages, config = build_graph_inputs(query)
+    config = with_deadline(config, request_budget(query))
+    # Admitted before the 200 header goes out, so a full server sheds load with a real 503 like /query
+    await admission.__aenter__()
+    released = False
+
+    async def release_admission():
+        nonlocal released
+        if not released:
+            released = True
+            await admission.__aexit__(None, None, None)
+
+    # The generator releases the slot when it finishes; the background task covers a body that never started
+    return StreamingResponse(
+        stream_travel_agent_events(react_app, messages, config, release_admission),
+        media_type="application/x-ndjson",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+        background=BackgroundTask(release_admission),
+    )
+
 # PDF and Test endpoints
 @app.get("/")
 def root_health_check():
     return {"status": "alive", "service": "GetSetGoAI-Backend"}
 
+@app.get("/ready")
+def readiness_check():
+    """
+    200 once this worker has a compiled graph and has finished warm-up, 503
+    before that. `/` only says the process is up; point health checks here.
+    """
+    graph_ready = getattr(app.state, "react_app", None) is not None
+    warmup = getattr(app.state, "warmup", None)
+    ready = graph_ready and warmup is not None
+    body = {
+        "ready": ready,
+        "graph": "ready" if graph_ready else getattr(app.state, "graph_error", None) or "building",
+        "warmup": warmup or "pending",
+    }
+    return JSONResponse(content=body, status_code=200 if ready else 503)
+
+@app.get("/metrics")
+def metrics():
+    """Prometheus text exposition of this worker's node, tool and upstream timings and cache hit/miss counts."""
+    return Response(content=telemetry.render(), media_type="text/plain; version=0.0.4; charset=utf-8")
+
+@app.get("/stats/load")
+def load_stats():
+    """Admission queue, per-upstream limiter, circuit breaker and job pool state, with queue-wait percentiles."""
+    return {
+        "admission": admission.stats(),
+        "upstreams": upstream_stats(),
+        "circuits": resilience_stats(),
+        "jobs": job_manager.stats(),
+    }
+
 @app.get("/test")
 def test_endpoint():
     return {"status": "ok"}
@@ -142,12 +142,54 @@ with st.sidebar:
     auto_convert = st.checkbox("Proactive Price Conversion", value=True)
     st.session_state["auto_convert"] = auto_convert
 
+    stream_responses = st.checkbox("Live progress (stream responses)", value=True)
+    st.session_state["stream_responses"] = stream_responses
+
     st.markdown("---")
     if st.button("🔄 Reset Conversation"):
         st.session_state.messages = []
         st.session_state["thread_id"] = str(uuid.uuid4())
         st.rerun()
 
+def stream_answer(payload: dict) -> str:
+    """Render a /query/stream response as it arrives and return the final answer."""
+    status = st.status("Our AI is planning your trip...", expanded=False)
+    placeholder = st.empty()
+    partial = ""
+    answer = None
+    with requests.post(f"{BASE_URL}/query/stream", json=payload, stream=True, timeout=(10, 300)) as response:
+        if response.status_code == 402:
+            status.update(label="Credits exceeded", state="error")
+            st.error("💳 Agentic credits exceeded. Please top up your provider account.")
+            return None
+        response.raise_for_status()
+        for raw_line in response.iter_lines(decode_unicode=True):
+            if not raw_line:
+                continue
+            event = json.loads(raw_line)
+            if event["type"] == "token":
+                partial += event["content"]
+                placeholder.markdown(partial + "▌")
+            elif event["type"] == "tool_start":
+                # Text written before a tool call is the agent thinking out loud; drop it
+                partial = ""
+                placeholder.empty()
+                status.write(f"🔎 Running `{event['tool']}`...")
+            elif event["type"] == "final":
+                answer = event["answer"]
+            elif event["type"] == "error":
+                status.update(label="Planning failed", state="error")
+                if event.get("status_code") == 402:
+                    st.error("💳 Agentic credits exceeded. Please top up your provider account.")
+                else:
+                    st.error(f"Failed to reach the travel assistant: {event['error']}")
+                return None
+
+    status.update(label="Your trip plan is ready", state="complete")
+    answer = answer or partial or "I prepared a plan for you, but could not retrieve the text."
+    placeholder.markdown(answer)
+    return answer
+
 # --- MAIN INTERFACE: Chatting with the AI ---
 st.header("Chat with Your Travel Assistant")
 
@@ -182,39 +224,47 @@ if prompt := st.chat_input("E.g., Plan a 5-day honeymoon in the Maldives"):
 
     # Fetch Assistant Response
     with st.chat_message("assistant", avatar="🤖"):
-        with st.spinner("Our AI is planning your trip..."):
+        payload = {
+            "query": prompt,
+            "num_travelers": int(num_travelers),
+            "travel_month": travel_month if travel_month != "Any" else None,
+            "allow_web": bool(allow_web),
+            "auto_convert": st.session_state.get("auto_convert", False),
+            "target_currency": st.session_state.get("currency", "USD"),
+            "thread_id": st.session_state.get("thread_id", "default"),
+            # Pass user-provided keys
+            "google_api_key": st.session_state.get("google_key"),
+            "groq_api_key": st.session_state.get("groq_key"),
+            "deepseek_api_key": st.session_state.get("deepseek_key"),
+            "tavily_api_key": st.session_state.get("tavily_key"),
+            "weather_api_key": st.session_state.get("weather_key"),
+            "exchange_api_key": st.session_state.get("exchange_key"),
+            "serp_api_key": st.session_state.get("serp_key")
+        }
+
+        if st.session_state.get("stream_responses", True):
             try:
-                payload = {
-                    "query": prompt,
-                    "num_travelers": int(num_travelers),
-                    "travel_month": travel_month if travel_month != "Any" else None,
-                    "allow_web": bool(allow_web),
-                    "auto_convert": st.session_state.get("auto_convert", False),
-                    "target_currency": st.session_state.get("currency", "USD"),
-                    "thread_id": st.session_state.get("thread_id", "default"),
-                    # Pass user-provided keys
-                    "google_api_key": st.session_state.get("google_key"),
-                    "groq_api_key": st.session_state.get("groq_key"),
-                    "deepseek_api_key": st.session_state.get("deepseek_key"),
-                    "tavily_api_key": st.session_state.get("tavily_key"),
-                    "weather_api_key": st.session_state.get("weather_key"),
-                    "exchange_api_key": st.session_state.get("exchange_key"),
-                    "serp_api_key": st.session_state.get("serp_key")
-                }
-                
-                response = requests.post(f"{BASE_URL}/query", json=payload, timeout=180)
-                
-                if response.status_code == 402:
-                    st.error("💳 Agentic credits exceeded. Please top up your provider account.")
-                else:
-                    response.raise_for_status()
-                    resp_json = response.json()
-                    answer = resp_json.get("answer", "I prepared a plan for you, but could not retrieve the text.")
-                    st.markdown(answer)
+                answer = stream_answer(payload)
+                if answer:
                     st.session_state.messages.append({"role": "assistant", "content": answer})
-
             except Exception as e:
                 st.error(f"Failed to reach the travel assistant: {str(e)}")
+        else:
+            with st.spinner("Our AI is planning your trip..."):
+                try:
+                    response = requests.post(f"{BASE_URL}/query", json=payload, timeout=180)
+                    
+                    if response.status_code == 402:
+                        st.error("💳 Agentic credits exceeded. Please top up your provider account.")
+                    else:
+                        response.raise_for_status()
+                        resp_json = response.json()
+                        answer = resp_json.get("answer", "I prepared a plan for you, but could not retrieve the text.")
+                        st.markdown(answer)
+                        st.session_state.messages.append({"role": "assistant", "content": answer})
+
+                except Exception as e:
+                    st.error(f"Failed to reach the travel assistant: {str(e)}")
 
 # --- EXPORT: Chat-to-PDF Functionality ---
 if st.session_state.get("messages"):
@@ -56,6 +56,142 @@ def test_graph_builder_init():
         print(f"❌ GraphBuilder error: {e}")
         return False
 
+def test_weather_cache():
+    """Test that concurrent weather lookups for one city share a single upstream call"""
+    import asyncio
+    from utils.weather_info import WeatherInfoTool
+
+    service = WeatherInfoTool(api_key="test")
+    calls = []
+
+    async def fake_request(endpoint, params):
+        calls.append((endpoint, params["q"]))
+        await asyncio.sleep(0.01)
+        return {"name": "Paris", "sys": {"country": "FR"}, "main": {"temp": 18}}
+
+    service._request = fake_request
+
+    async def run():
+        await asyncio.gather(*(service.get_weather("paris") for _ in range(50)))
+        await service.get_weather("  Paris ,  FR ")
+
+    asyncio.run(run())
+    stats = service.cache_stats()
+    assert calls == [("weather", "paris")], calls
+    assert stats["misses"] == 1 and stats["coalesced"] == 49 and stats["hits"] == 1, stats
+    print(f"✅ Weather cache successful! {stats}")
+    return True
+
+def test_history_compaction():
+    """Test that old tool outputs are digested and the prompt stays within the token budget"""
+    from langchain_core.messages import AIMessage, HumanMessage, SystemMessage, ToolMessage
+    from Agent.history import HistoryCompactor
+
+    compactor = HistoryCompactor(token_budget=2000, keep_recent_turns=1, tool_digest_chars=100)
+    history = []
+    for i in range(10):
+        call = {"name": "research_destination", "args": {"place": f"city {i}"}, "id": f"call_{i}"}
+        history += [
+            HumanMessage(content=f"Plan a trip to city {i}"),
+            AIMessage(content="", tool_calls=[call]),
+            ToolMessage(content="lorem ipsum " * 400, tool_call_id=f"call_{i}"),
+            AIMessage(content=f"Here is your plan for city {i}"),
+        ]
+
+    prompt, usage = compactor.compact(SystemMessage(content="system"), history)
+    assert usage["after"] <= 2000 < usage["before"], usage
+    assert prompt[-4:] == history[-4:], "the latest turn must be sent verbatim"
+    tool_ids = {m.tool_call_id for m in prompt if isinstance(m, ToolMessage)}
+    call_ids = {c["id"] for m in prompt if isinstance(m, AIMessage) for c in m.tool_calls}
+    assert tool_ids == call_ids, "tool calls and results must stay paired"
+
+    # A single in-progress turn over budget: earlier tool outputs are digested, the latest kept verbatim
+    turn = [HumanMessage(content="Plan a trip to Goa")]
+    for i in range(4):
+        call = {"name": "search_hotels", "args": {"place": "Goa"}, "id": f"goa_{i}"}
+        turn += [AIMessage(content="", tool_calls=[call]), ToolMessage(content="lorem ipsum " * 400, tool_call_id=f"goa_{i}")]
+    prompt, usage = compactor.compact(SystemMessage(content="system"), turn)
+    assert usage["after"] <= 2000 < usage["before"] and usage["digested_recent"] >= 1, usage
+    assert prompt[-1] == turn[-1], "the latest tool output must be sent verbatim"
+    print(f"✅ History compaction successful! {usage}")
+    return True
+
+def test_structured_output():
+    """Test that the trailing JSON itinerary is split off, validated and hidden from streamed tokens"""
+    from utils.structured_output import JsonBlockFilter, parse_structured_output
+
+    text = 'Your Goa plan.\n```json\n{"destination": "Goa", "days": [{"day": 1, "activities": ["Beach"]}]}\n```'
+    answer, structured = parse_structured_output(text)
+    assert answer == "Your Goa plan.", answer
+    assert structured == {"destination": "Goa", "days": [{"day": 1, "activities": ["Beach"]}]}, structured
+    assert parse_structured_output('Plan\n```json\n{"days": "soon"}\n```') == ("Plan", None)
+
+    stream_filter = JsonBlockFilter()
+    streamed = "".join(stream_filter.feed(text[i:i + 3]) for i in range(0, len(text), 3)) + stream_filter.flush()
+    assert streamed.strip() == "Your Goa plan.", streamed
+    print("✅ Structured output parsing successful!")
+    return True
+
+def test_upstream_resilience():
+    """Test that upstream calls are retried, short-circuited when failing and bounded by the request deadline"""
+    import asyncio
+    import httpx
+    from exception.exceptions import DeadlineExceededError, UpstreamUnavailableError
+    from utils.resilience import CircuitBreaker, call_upstream, deadline_scope
+
+    async def scenario():
+        calls = []
+
+        async def flaky():
+            calls.append(1)
+            if len(calls) < 2:
+                raise httpx.ConnectError("connection reset")
+            return "ok"
+
+        assert await call_upstream("test_flaky", flaky) == "ok" and len(calls) == 2
+
+        async def slow():
+            await asyncio.sleep(5)
+
+        with deadline_scope(0.2):
+            try:
+                await call_upstream("test_slow", slow)
+                raise AssertionError("the deadline should cut the call short")
+            except DeadlineExceededError:
+                pass
+
+    asyncio.run(scenario())
+
+    breaker = CircuitBreaker("test_breaker", failure_threshold=2, cooldown=60)
+    breaker.record_failure()
+    breaker.record_failure()
+    try:
+        breaker.before_call()
+        raise AssertionError("an open circuit should fail fast")
+    except UpstreamUnavailableError:
+        pass
+    print("✅ Upstream resilience successful!")
+    return True
+
+def test_telemetry():
+    """Test that spans feed the Prometheus histograms and pick up cache hit/miss tags"""
+    from utils.telemetry import Telemetry
+
+    metrics = Telemetry(enabled=True, otel=False, buckets=[0.1, 1])
+    with metrics.span("tool", "search_hotels", provider="tavily"):
+        metrics.record_cache("search", "miss")
+    text = metrics.render()
+    labels = 'kind="tool",name="search_hotels",provider="tavily",cache="miss",status="ok"'
+    assert f'getsetgo_operation_duration_seconds_bucket{{{labels},le="0.1"}} 1' in text, text
+    assert 'getsetgo_cache_requests_total{cache="search",result="miss"} 1' in text, text
+
+    disabled = Telemetry(enabled=False)
+    with disabled.span("tool", "search_hotels"):
+        disabled.record_cache("search", "hit")
+    assert "search_hotels" not in disabled.render()
+    print("✅ Telemetry successful!")
+    return True
+
 def check_env_setup():
     """Check if environment is set up"""
     load_dotenv()
@@ -89,6 +225,11 @@ def main():
         ("Import Tests", test_imports),
         ("Config Loading", test_config_loading),
         ("Model Loader", test_model_loader),
+        ("Weather Cache", test_weather_cache),
+        ("History Compaction", test_history_compaction),
+        ("Structured Output", test_structured_output),
+        ("Upstream Resilience", test_upstream_resilience),
+        ("Telemetry", test_telemetry),
         ("Environment Setup", check_env_setup),
         ("Graph Builder", test_graph_builder_init),
     ]
@@ -1,7 +1,4 @@
-import os
-from dotenv import load_dotenv
 from langchain.tools import tool
-load_dotenv()
 
 class ArithematicOperationsTool():
     def __init__(self):
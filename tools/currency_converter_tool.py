@@ -1,14 +1,18 @@
-import os
-from dotenv import load_dotenv
 from langchain_core.tools import tool
 from typing import List
+from pydantic import BaseModel, Field
 from utils.currency_converter import CurrencyConverter
+from utils.config_loader import get_env
 from langchain_core.runnables import RunnableConfig
 
+class CurrencyConversionItem(BaseModel):
+    amount: float = Field(description="Amount of money to convert")
+    from_currency: str = Field(description="Currency code of the amount, e.g. USD")
+    to_currency: str = Field(description="Currency code to convert to, e.g. INR")
+
 class CurrencyConverterTool:
     def __init__(self):
-        load_dotenv()
-        self.api_key = os.environ.get("EXCHANGE_API_KEY")
+        self.api_key = get_env("EXCHANGE_API_KEY")
         self.currency_service = CurrencyConverter(self.api_key)
         self.currency_tools_list = self._setup_tools()
         
@@ -26,10 +30,29 @@ class CurrencyConverterTool:
             except Exception as e:
                 # Return a readable error message instead of crashing
                 return f"Currency conversion failed: {e}"
+
+        @tool
+        async def convert_currency_batch(items: List[CurrencyConversionItem], config: RunnableConfig):
+            """
+            Convert a whole list of prices in one call. Prefer this over repeated
+            convert_currency calls whenever more than one amount needs converting.
+            Each item is {amount, from_currency, to_currency}; results come back in the same order.
+            """
+            api_keys = config.get("configurable", {}).get("api_keys", {})
+            user_key = api_keys.get("exchange_api_key")
+
+            try:
+                return await self.currency_service.convert_many(
+                    [(item.amount, item.from_currency, item.to_currency) for item in items],
+                    api_key=user_key,
+                )
+            except Exception as e:
+                # Return a readable error message instead of crashing
+                return f"Currency conversion failed: {e}"
             
-        return [convert_currency]
+        return [convert_currency, convert_currency_batch]
 
 
 
 
-    
\ No newline at end of file
+    
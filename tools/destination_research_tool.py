@@ -0,0 +1,66 @@
+import asyncio
+import logging
+from typing import List
+from langchain_core.tools import tool
+from langchain_core.runnables import RunnableConfig
+from tools.place_search_tool import LocationInfoTool
+from tools.weather_info_tool import WeatherInfoTool
+from utils.config_loader import get_config
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_RESEARCH_SETTINGS = {"branch_timeout": 20, "max_section_chars": 1200}
+
+class DestinationResearchTool:
+    def __init__(self, location_tools: LocationInfoTool, weather_tools: WeatherInfoTool):
+        self.location_tools = location_tools
+        self.weather_tools = weather_tools
+        research_cfg = {**DEFAULT_RESEARCH_SETTINGS, **(get_config().get("research") or {})}
+        self.branch_timeout = research_cfg["branch_timeout"]
+        self.max_section_chars = research_cfg["max_section_chars"]
+        self.research_tools_list = self._setup_tools()
+
+    async def _branch(self, title: str, coro) -> str:
+        """Run one research branch under its own timeout; a failing branch never sinks the others."""
+        try:
+            result = await asyncio.wait_for(coro, timeout=self.branch_timeout)
+        except asyncio.TimeoutError:
+            logger.warning(f"Destination research branch '{title}' timed out after {self.branch_timeout}s")
+            result = "unavailable (timed out)"
+        except Exception as e:
+            logger.warning(f"Destination research branch '{title}' failed: {e}")
+            result = f"unavailable ({e})"
+        result = str(result).strip()
+        if len(result) > self.max_section_chars:
+            result = result[:self.max_section_chars].rsplit("\n", 1)[0] + "\n…"
+        return f"## {title}\n{result}"
+
+    async def research(self, place: str, config: RunnableConfig) -> str:
+        """Fetch every research category for `place` concurrently and merge them into one digest."""
+        search = self.location_tools.search
+        branches = [
+            ("Attractions", search("attractions", place, config)),
+            ("Restaurants", search("restaurants", place, config)),
+            ("Hotels", search("hotels", place, config)),
+            ("Activities", search("activities", place, config)),
+            ("Transportation", search("transportation", place, config)),
+            ("Current Weather", self.weather_tools.current_weather(place, config)),
+            ("Weather Forecast", self.weather_tools.weather_forecast(place, config)),
+        ]
+        sections = await asyncio.gather(*(self._branch(title, coro) for title, coro in branches))
+        return f"# Destination research: {place}\n\n" + "\n\n".join(sections)
+
+    def _setup_tools(self) -> List:
+        """Setup the composite destination research tool"""
+
+        @tool
+        async def research_destination(place: str, config: RunnableConfig) -> str:
+            """
+            Research a destination in a single call: attractions, restaurants, hotels,
+            activities, transportation, current weather and a 5-day forecast, fetched
+            concurrently. Use this first for any place you are planning a trip to, and
+            only fall back to the individual search/weather tools for follow-up detail.
+            """
+            return await self.research(place, config)
+
+        return [research_destination]
@@ -1,90 +1,96 @@
-import os
+import logging
 from utils.place_info_search import SerpAPISearchTool, TavilySearchTool
+from utils.search_cache import SearchCache, search_cache_key
+from utils.resilience import call_upstream, is_retryable
+from utils.telemetry import current_span
+from exception.exceptions import BaseAppException
 from typing import List
 from langchain.tools import tool
-from dotenv import load_dotenv
+from utils.config_loader import get_env
 from langchain_core.runnables import RunnableConfig
 
+logger = logging.getLogger(__name__)
+
+# kind -> (SerpAPISearchTool method, TavilySearchTool method)
+SEARCH_METHODS = {
+    "attractions": ("search_attractions", "search_attractions"),
+    "restaurants": ("search_restaurants", "tavily_search_restaurants"),
+    "hotels": ("search_hotels", "tavily_search_hotels"),
+    "activities": ("search_activity", "tavily_search_activity"),
+    "transportation": ("search_transportation", "tavily_search_transportation"),
+}
+
+def is_cacheable_result(text: str) -> bool:
+    """Empty results and stringified error payloads go back to the agent but are never cached."""
+    return bool(text and text.strip()) and not text.lstrip().startswith("{'error'")
+
 class LocationInfoTool:
     def __init__(self):
-        load_dotenv()
-        serp_api_key = os.getenv("SERPAPI_API_KEY")
-        tavily_api_key = os.getenv("TAVILY_API_KEY")
+        serp_api_key = get_env("SERPAPI_API_KEY")
+        tavily_api_key = get_env("TAVILY_API_KEY")
         try:
             self.serp_tool = SerpAPISearchTool(api_key=serp_api_key) if serp_api_key else None
         except ImportError:
-            print("⚠️  SerpAPI not available, using Tavily only")
+            logger.warning("SerpAPI not available, using Tavily only")
             self.serp_tool = None
         self.tavily_tool = TavilySearchTool(api_key=tavily_api_key) if tavily_api_key else None
+        self.search_cache = SearchCache.from_config()
         self.place_search_tools_list = self._setup_tools()
-        
+
+    async def search(self, kind: str, place: str, config: RunnableConfig) -> str:
+        """Run a `kind` search (see SEARCH_METHODS) for `place`, served from the search cache when possible."""
+        api_keys = config.get("configurable", {}).get("api_keys", {})
+        serp_method, tavily_method = SEARCH_METHODS[kind]
+
+        if self.serp_tool:
+            provider = "serpapi"
+            call = lambda: getattr(self.serp_tool, serp_method)(place, api_key=api_keys.get("serp_api_key"))
+        elif self.tavily_tool:
+            provider = "tavily"
+            call = lambda: getattr(self.tavily_tool, tavily_method)(place, api_key=api_keys.get("tavily_api_key"))
+        else:
+            return "No search API available"
+        current_span().set("provider", provider)
+
+        # Searches are idempotent GETs: retried with jitter, bounded by the request deadline
+        fetch = lambda: call_upstream(provider, call)
+        try:
+            return await self.search_cache.get_or_set(
+                kind, search_cache_key(provider, kind, place), fetch, should_cache=is_cacheable_result
+            )
+        except Exception as e:
+            if not (is_retryable(e) or isinstance(e, BaseAppException)):
+                raise
+            # Let the agent carry on with the other tools instead of failing the whole request
+            return f"{kind.capitalize()} search for {place} is unavailable right now ({getattr(e, 'message', type(e).__name__)})."
+
     def _setup_tools(self) -> List:
         """Setup all the tools for place search"""
-        
+
         @tool
         async def search_attractions(place: str, config: RunnableConfig) -> str:
             """Search for top attractions in and around a given place."""
-            api_keys = config.get("configurable", {}).get("api_keys", {})
-            serp_key = api_keys.get("serp_api_key")
-            tavily_key = api_keys.get("tavily_api_key")
+            return await self.search("attractions", place, config)
 
-            if self.serp_tool:
-                return await self.serp_tool.search_attractions(place, api_key=serp_key)
-            elif self.tavily_tool:
-                return await self.tavily_tool.search_attractions(place, api_key=tavily_key)
-            return "No search API available"
-            
         @tool
         async def search_restaurants(place: str, config: RunnableConfig) -> str:
             """Search for top restaurants in and around a given place."""
-            api_keys = config.get("configurable", {}).get("api_keys", {})
-            serp_key = api_keys.get("serp_api_key")
-            tavily_key = api_keys.get("tavily_api_key")
+            return await self.search("restaurants", place, config)
 
-            if self.serp_tool:
-                return await self.serp_tool.search_restaurants(place, api_key=serp_key)
-            elif self.tavily_tool:
-                return await self.tavily_tool.tavily_search_restaurants(place, api_key=tavily_key)
-            return "No search API available"
-            
         @tool
         async def search_hotels(place: str, config: RunnableConfig) -> str:
             """Search for top hotels in and around a given place."""
-            api_keys = config.get("configurable", {}).get("api_keys", {})
-            serp_key = api_keys.get("serp_api_key")
-            tavily_key = api_keys.get("tavily_api_key")
+            return await self.search("hotels", place, config)
 
-            if self.serp_tool:
-                return await self.serp_tool.search_hotels(place, api_key=serp_key)
-            elif self.tavily_tool:
-                return await self.tavily_tool.tavily_search_hotels(place, api_key=tavily_key)
-            return "No search API available"
-            
         @tool
         async def search_activities(place: str, config: RunnableConfig) -> str:
             """Search for top activities in and around a given place."""
-            api_keys = config.get("configurable", {}).get("api_keys", {})
-            serp_key = api_keys.get("serp_api_key")
-            tavily_key = api_keys.get("tavily_api_key")
+            return await self.search("activities", place, config)
 
-            if self.serp_tool:
-                return await self.serp_tool.search_activity(place, api_key=serp_key)
-            elif self.tavily_tool:
-                return await self.tavily_tool.tavily_search_activity(place, api_key=tavily_key)
-            return "No search API available"
-            
         @tool
         async def search_transportation(place: str, config: RunnableConfig) -> str:
             """Search for transportation options in and around a given place."""
-            api_keys = config.get("configurable", {}).get("api_keys", {})
-            serp_key = api_keys.get("serp_api_key")
-            tavily_key = api_keys.get("tavily_api_key")
+            return await self.search("transportation", place, config)
 
-            if self.serp_tool:
-                return await self.serp_tool.search_transportation(place, api_key=serp_key)
-            elif self.tavily_tool:
-                return await self.tavily_tool.tavily_search_transportation(place, api_key=tavily_key)
-            return "No search API available"
-            
         return [search_attractions, search_restaurants, search_hotels, search_activities, search_transportation]
-    
\ No newline at end of file
+
@@ -0,0 +1,207 @@
+import asyncio
+import logging
+import os
+import time
+import zlib
+from typing import Any, Optional, Tuple
+
+from langgraph.checkpoint.base import BaseCheckpointSaver
+from langgraph.checkpoint.memory import MemorySaver
+from langgraph.checkpoint.serde.jsonplus import JsonPlusSerializer
+
+from utils.config_loader import BASE_DIR, get_config
+
+try:
+    import aiosqlite
+    from langgraph.checkpoint.sqlite.aio import AsyncSqliteSaver
+except ImportError:
+    aiosqlite = None
+    AsyncSqliteSaver = None
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CHECKPOINTER_SETTINGS = {
+    "backend": "sqlite",
+    "path": "data/checkpoints.sqlite3",
+    "thread_ttl": 7 * 86400,
+    "max_threads": 10000,
+    "keep_checkpoints": 2,
+    "compress_min_bytes": 1024,
+    "prune_interval": 300,
+}
+
+_ACTIVITY_SCHEMA = """
+CREATE TABLE IF NOT EXISTS thread_activity (
+    thread_id TEXT PRIMARY KEY,
+    updated_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS thread_activity_updated ON thread_activity (updated_at);
+"""
+
+
+class CompressedSerializer(JsonPlusSerializer):
+    """msgpack serializer that zlib-compresses payloads above `min_bytes`."""
+
+    PREFIX = "zlib:"
+
+    def __init__(self, min_bytes: int = 1024, **kwargs):
+        super().__init__(**kwargs)
+        self.min_bytes = min_bytes
+
+    def dumps_typed(self, obj: Any) -> Tuple[str, bytes]:
+        type_, data = super().dumps_typed(obj)
+        if self.min_bytes and len(data) >= self.min_bytes:
+            return f"{self.PREFIX}{type_}", zlib.compress(data)
+        return type_, data
+
+    def loads_typed(self, data: Tuple[str, bytes]) -> Any:
+        type_, payload = data
+        if type_.startswith(self.PREFIX):
+            return super().loads_typed((type_[len(self.PREFIX):], zlib.decompress(payload)))
+        return super().loads_typed(data)
+
+
+if AsyncSqliteSaver is not None:
+
+    class DurableSqliteSaver(AsyncSqliteSaver):
+        """
+        SQLite (WAL) checkpointer that every gunicorn worker can share.
+
+        On top of AsyncSqliteSaver it:
+        - opens its connection lazily, so the graph can be compiled outside an event loop;
+        - keeps only the newest `keep_checkpoints` checkpoints per thread (the
+          graph's state uses plain reducer channels, so the latest checkpoint
+          holds the full conversation);
+        - expires threads idle for longer than `thread_ttl` and caps the store
+          at `max_threads`, evicting the least recently active threads.
+        """
+
+        def __init__(self, path: str, *, thread_ttl: float, max_threads: int, keep_checkpoints: int,
+                     prune_interval: float, serde=None):
+            BaseCheckpointSaver.__init__(self, serde=serde)
+            self.jsonplus_serde = JsonPlusSerializer()
+            self.path = path
+            self.conn = aiosqlite.connect(path, timeout=30)
+            # Don't let an unclosed connection (scripts, tests, crashed lifespans) block interpreter exit;
+            # every write is committed immediately so nothing is lost
+            worker = getattr(self.conn, "_thread", None)
+            if worker is not None:
+                worker.daemon = True
+            self.lock = asyncio.Lock()
+            self.loop = None
+            self.is_setup = False
+            self.thread_ttl = thread_ttl
+            self.max_threads = max_threads
+            self.keep_checkpoints = keep_checkpoints
+            self.prune_interval = prune_interval
+            self._last_prune = 0.0
+
+        async def setup(self) -> None:
+            if self.is_setup:
+                return
+            self.loop = asyncio.get_running_loop()
+            await super().setup()
+            await self.conn.execute("PRAGMA synchronous=NORMAL")
+            await self.conn.executescript(_ACTIVITY_SCHEMA)
+            await self.conn.commit()
+
+        async def aput(self, config, checkpoint, metadata, new_versions):
+            next_config = await super().aput(config, checkpoint, metadata, new_versions)
+            thread_id = str(config["configurable"]["thread_id"])
+            checkpoint_ns = config["configurable"].get("checkpoint_ns", "")
+            async with self.lock:
+                await self.conn.execute(
+                    "INSERT OR REPLACE INTO thread_activity (thread_id, updated_at) VALUES (?, ?)",
+                    (thread_id, time.time()),
+                )
+                if self.keep_checkpoints:
+                    await self._compact_thread(thread_id, checkpoint_ns)
+                await self.conn.commit()
+
+            if time.monotonic() - self._last_prune > self.prune_interval:
+                self._last_prune = time.monotonic()
+                await self.prune()
+            return next_config
+
+        async def _compact_thread(self, thread_id: str, checkpoint_ns: str) -> None:
+            # Must be called with self.lock held
+            keep = (
+                "SELECT checkpoint_id FROM checkpoints WHERE thread_id = ? AND checkpoint_ns = ? "
+                "ORDER BY checkpoint_id DESC LIMIT ?"
+            )
+            args = (thread_id, checkpoint_ns, thread_id, checkpoint_ns, self.keep_checkpoints)
+            await self.conn.execute(
+                f"DELETE FROM checkpoints WHERE thread_id = ? AND checkpoint_ns = ? AND checkpoint_id NOT IN ({keep})",
+                args,
+            )
+            await self.conn.execute(
+                f"DELETE FROM writes WHERE thread_id = ? AND checkpoint_ns = ? AND checkpoint_id NOT IN ({keep})",
+                args,
+            )
+
+        async def prune(self) -> int:
+            """Delete expired threads and enforce `max_threads`. Returns the number of threads removed."""
+            await self.setup()
+            async with self.lock:
+                cutoff = time.time() - self.thread_ttl
+                async with self.conn.execute(
+                    "SELECT thread_id FROM thread_activity WHERE updated_at < ?", (cutoff,)
+                ) as cursor:
+                    expired = [row[0] for row in await cursor.fetchall()]
+                async with self.conn.execute("SELECT COUNT(*) FROM thread_activity") as cursor:
+                    (count,) = await cursor.fetchone()
+                overflow = count - len(expired) - self.max_threads
+                if overflow > 0:
+                    async with self.conn.execute(
+                        "SELECT thread_id FROM thread_activity WHERE updated_at >= ? ORDER BY updated_at ASC LIMIT ?",
+                        (cutoff, overflow),
+                    ) as cursor:
+                        expired += [row[0] for row in await cursor.fetchall()]
+
+                for table in ("checkpoints", "writes", "thread_activity"):
+                    await self.conn.executemany(
+                        f"DELETE FROM {table} WHERE thread_id = ?", [(thread_id,) for thread_id in expired]
+                    )
+                await self.conn.commit()
+            if expired:
+                logger.info(f"Pruned {len(expired)} conversation threads from the checkpoint store")
+            return len(expired)
+
+        async def aclose(self) -> None:
+            if self.is_setup:
+                await self.conn.close()
+                self.is_setup = False
+
+else:
+    DurableSqliteSaver = None
+
+
+def build_checkpointer() -> BaseCheckpointSaver:
+    """Build the checkpointer selected by the `checkpointer` section of config.yaml."""
+    cfg = {**DEFAULT_CHECKPOINTER_SETTINGS, **(get_config().get("checkpointer") or {})}
+    serde = CompressedSerializer(min_bytes=cfg["compress_min_bytes"])
+
+    if cfg["backend"] == "memory":
+        return MemorySaver(serde=serde)
+    if cfg["backend"] != "sqlite":
+        raise ValueError(f"Unknown checkpointer backend '{cfg['backend']}' in config.yaml")
+    if DurableSqliteSaver is None:
+        logger.warning("langgraph-checkpoint-sqlite/aiosqlite not installed; falling back to in-memory checkpoints")
+        return MemorySaver(serde=serde)
+
+    path = cfg["path"] if os.path.isabs(cfg["path"]) else os.path.join(BASE_DIR, cfg["path"])
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    return DurableSqliteSaver(
+        path,
+        thread_ttl=cfg["thread_ttl"],
+        max_threads=cfg["max_threads"],
+        keep_checkpoints=cfg["keep_checkpoints"],
+        prune_interval=cfg["prune_interval"],
+        serde=serde,
+    )
+
+
+async def close_checkpointer(checkpointer: Optional[BaseCheckpointSaver]) -> None:
+    close = getattr(checkpointer, "aclose", None)
+    if close is not None:
+        await close()
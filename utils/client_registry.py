@@ -0,0 +1,86 @@
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Optional, Tuple
+
+
+def hash_api_key(api_key: Optional[str]) -> str:
+    """Stable, non-reversible identifier for an API key, safe to use in keys, logs and metrics."""
+    if not api_key:
+        return "default"
+    return hashlib.sha256(api_key.encode("utf-8")).hexdigest()[:16]
+
+
+class ClientRegistry:
+    """
+    Bounded LRU registry of provider clients keyed by (provider, hashed api key).
+
+    Building SDK clients involves pydantic validation and session setup, so
+    they are built once per key and reused. Raw keys are never stored as
+    registry keys. With `ttl` set, clients idle for longer than `ttl` seconds
+    are dropped so that keys nobody uses any more do not linger.
+    """
+
+    def __init__(self, maxsize: int = 64, name: str = "clients", ttl: Optional[float] = None):
+        self.maxsize = maxsize
+        self.name = name
+        self.ttl = ttl
+        self._clients: "OrderedDict[Tuple[str, str], Tuple[float, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def __len__(self) -> int:
+        return len(self._clients)
+
+    def get_or_create(self, provider: str, api_key: Optional[str], factory: Callable[[], Any]) -> Any:
+        key = (provider, hash_api_key(api_key))
+        with self._lock:
+            now = time.monotonic()
+            self._expire(now)
+            entry = self._clients.get(key)
+            if entry is not None:
+                self._clients[key] = (now, entry[1])
+                self._clients.move_to_end(key)
+                self.hits += 1
+                return entry[1]
+            self.misses += 1
+
+        client = factory()
+        with self._lock:
+            # Keep the first client if another thread built one concurrently
+            _, client = self._clients.setdefault(key, (time.monotonic(), client))
+            self._clients.move_to_end(key)
+            while len(self._clients) > self.maxsize:
+                self._clients.popitem(last=False)
+                self.evictions += 1
+        return client
+
+    def _expire(self, now: float) -> None:
+        # Entries are kept in last-used order, so idle ones are always at the front
+        if self.ttl is None:
+            return
+        while self._clients:
+            key, (last_used, _) = next(iter(self._clients.items()))
+            if now - last_used <= self.ttl:
+                break
+            del self._clients[key]
+            self.expirations += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._clients.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "name": self.name,
+            "size": len(self._clients),
+            "maxsize": self.maxsize,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+        }
@@ -0,0 +1,252 @@
+import asyncio
+import logging
+import time
+from collections import deque
+from typing import Any, Dict, Optional
+
+from exception.exceptions import DeadlineExceededError, ServiceOverloadedError
+from utils.config_loader import get_config
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_ADMISSION_SETTINGS = {"max_active": 16, "max_queue": 32, "queue_timeout": 10}
+DEFAULT_UPSTREAM_SETTINGS = {"max_concurrent": 8, "rate": None, "burst": None, "max_wait": 30}
+
+
+class WaitStats:
+    """Count, mean and recent percentiles of queue-wait durations (seconds)."""
+
+    def __init__(self, window: int = 1000):
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        self._recent: "deque[float]" = deque(maxlen=window)
+
+    def record(self, seconds: float) -> None:
+        self.count += 1
+        self.total += seconds
+        self.max = max(self.max, seconds)
+        self._recent.append(seconds)
+
+    def summary(self) -> Dict[str, float]:
+        recent = sorted(self._recent)
+        pct = lambda p: recent[min(len(recent) - 1, int(p / 100 * len(recent)))] * 1000 if recent else 0.0
+        return {
+            "waits": self.count,
+            "wait_mean_ms": self.total / self.count * 1000 if self.count else 0.0,
+            "wait_p50_ms": pct(50),
+            "wait_p95_ms": pct(95),
+            "wait_max_ms": self.max * 1000,
+        }
+
+
+class _LoopBound:
+    """Rebuilds asyncio primitives if the running event loop changes (tests, scripts)."""
+
+    def __init__(self):
+        self._loop = None
+
+    def _bind(self) -> None:
+        loop = asyncio.get_running_loop()
+        if loop is not self._loop:
+            self._loop = loop
+            self._reset()
+
+    def _reset(self) -> None:
+        raise NotImplementedError
+
+
+class TokenBucket(_LoopBound):
+    """Allows `rate` acquisitions per second on average, with bursts of up to `burst`."""
+
+    def __init__(self, rate: float, burst: Optional[float] = None):
+        super().__init__()
+        self.rate = rate
+        self.burst = burst or max(1.0, rate)
+        self._tokens = self.burst
+        self._updated = time.monotonic()
+
+    def _reset(self) -> None:
+        self._lock = asyncio.Lock()
+
+    async def acquire(self) -> None:
+        self._bind()
+        # Waiters queue on the lock, so tokens are handed out in arrival order
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                await asyncio.sleep((1 - self._tokens) / self.rate)
+
+
+class UpstreamLimiter(_LoopBound):
+    """
+    Concurrency cap plus optional rate limit for one upstream API.
+
+    Use as `async with upstream_limit("tavily"):` around the outbound call.
+    Callers that cannot start within `max_wait` seconds get a
+    ServiceOverloadedError instead of piling more load on the provider, and
+    never wait past the request deadline (DeadlineExceededError).
+    """
+
+    def __init__(self, name: str, max_concurrent: int = 8, rate: Optional[float] = None,
+                 burst: Optional[float] = None, max_wait: float = 30):
+        super().__init__()
+        self.name = name
+        self.max_concurrent = max_concurrent
+        self.max_wait = max_wait
+        self.bucket = TokenBucket(rate, burst) if rate else None
+        self.active = 0
+        self.waiting = 0
+        self.rejected = 0
+        self.waits = WaitStats()
+
+    def _reset(self) -> None:
+        self._semaphore = asyncio.Semaphore(self.max_concurrent)
+
+    async def _acquire(self) -> None:
+        await self._semaphore.acquire()
+        if self.bucket is not None:
+            try:
+                await self.bucket.acquire()
+            except BaseException:
+                self._semaphore.release()
+                raise
+
+    async def __aenter__(self) -> "UpstreamLimiter":
+        # Imported here: utils.resilience builds on this module
+        from utils.resilience import remaining_budget
+
+        self._bind()
+        # Never queue past the request deadline
+        budget = remaining_budget()
+        if budget is not None and budget <= 0:
+            raise DeadlineExceededError(f"Request deadline reached before a {self.name} slot was free.")
+        max_wait = self.max_wait if budget is None else min(self.max_wait, budget)
+        start = time.monotonic()
+        self.waiting += 1
+        try:
+            await asyncio.wait_for(self._acquire(), timeout=max_wait)
+        except asyncio.TimeoutError:
+            if max_wait < self.max_wait:
+                raise DeadlineExceededError(f"Request deadline reached while waiting for a {self.name} slot.")
+            self.rejected += 1
+            raise ServiceOverloadedError(f"The {self.name} service is busy. Please retry shortly.")
+        finally:
+            self.waiting -= 1
+        waited = time.monotonic() - start
+        self.waits.record(waited)
+        if waited > 1:
+            logger.info(f"Waited {waited:.2f}s for a {self.name} slot")
+        self.active += 1
+        return self
+
+    async def __aexit__(self, *exc_info) -> None:
+        self.active -= 1
+        self._semaphore.release()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "name": self.name,
+            "active": self.active,
+            "waiting": self.waiting,
+            "max_concurrent": self.max_concurrent,
+            "rate": self.bucket.rate if self.bucket else None,
+            "rejected": self.rejected,
+            **self.waits.summary(),
+        }
+
+
+class AdmissionController(_LoopBound):
+    """
+    Bounded queue in front of agent runs.
+
+    Up to `max_active` runs execute at once and up to `max_queue` more wait
+    for a slot; anything beyond that, or a wait longer than
+    `queue_timeout`, is rejected right away with a 503 so latency stays
+    predictable under load.
+    """
+
+    def __init__(self, max_active: int = 16, max_queue: int = 32, queue_timeout: float = 10):
+        super().__init__()
+        self.max_active = max_active
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self.active = 0
+        self.waiting = 0
+        self.admitted = 0
+        self.rejected = 0
+        self.waits = WaitStats()
+
+    @classmethod
+    def from_config(cls) -> "AdmissionController":
+        cfg = {**DEFAULT_ADMISSION_SETTINGS, **((get_config().get("concurrency") or {}).get("admission") or {})}
+        return cls(max_active=cfg["max_active"], max_queue=cfg["max_queue"], queue_timeout=cfg["queue_timeout"])
+
+    def _reset(self) -> None:
+        self._semaphore = asyncio.Semaphore(self.max_active)
+
+    def _reject(self, reason: str) -> ServiceOverloadedError:
+        self.rejected += 1
+        logger.warning(f"Rejecting request: {reason} ({self.active} active, {self.waiting} queued)")
+        return ServiceOverloadedError()
+
+    async def __aenter__(self) -> "AdmissionController":
+        self._bind()
+        start = time.monotonic()
+        if not self._semaphore.locked():
+            # A free slot is taken without suspending, so the next arrival already sees it as used
+            await self._semaphore.acquire()
+        elif self.waiting >= self.max_queue:
+            raise self._reject("queue full")
+        else:
+            self.waiting += 1
+            try:
+                await asyncio.wait_for(self._semaphore.acquire(), timeout=self.queue_timeout)
+            except asyncio.TimeoutError:
+                raise self._reject("queue wait timed out")
+            finally:
+                self.waiting -= 1
+        self.waits.record(time.monotonic() - start)
+        self.active += 1
+        self.admitted += 1
+        return self
+
+    async def __aexit__(self, *exc_info) -> None:
+        self.active -= 1
+        self._semaphore.release()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "name": "admission",
+            "active": self.active,
+            "queued": self.waiting,
+            "max_active": self.max_active,
+            "max_queue": self.max_queue,
+            "admitted": self.admitted,
+            "rejected": self.rejected,
+            **self.waits.summary(),
+        }
+
+
+_upstreams: Dict[str, UpstreamLimiter] = {}
+
+
+def upstream_limit(name: str) -> UpstreamLimiter:
+    """Process-wide limiter for upstream `name`, configured under `concurrency.upstreams` in config.yaml."""
+    limiter = _upstreams.get(name)
+    if limiter is None:
+        upstreams = (get_config().get("concurrency") or {}).get("upstreams") or {}
+        cfg = {**DEFAULT_UPSTREAM_SETTINGS, **(upstreams.get(name) or {})}
+        limiter = _upstreams[name] = UpstreamLimiter(
+            name, max_concurrent=cfg["max_concurrent"], rate=cfg["rate"], burst=cfg["burst"], max_wait=cfg["max_wait"]
+        )
+    return limiter
+
+
+def upstream_stats() -> Dict[str, Dict[str, Any]]:
+    return {name: limiter.stats() for name, limiter in _upstreams.items()}
@@ -1,12 +1,73 @@
 import yaml
 import os
+import threading
+import time
+from types import MappingProxyType
+from typing import Any, Dict, Mapping, Optional, Tuple
 
-def load_config(config_path: str = None) -> dict:
-    if config_path is None:
-        # Get the directory of the current file (utils/) and go up one level to root
-        base_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
-        config_path = os.path.join(base_dir, "config", "config.yaml")
-        
-    with open(config_path, "r") as f:
-        config = yaml.safe_load(f)
-    return config
\ No newline at end of file
+from dotenv import load_dotenv
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DEFAULT_CONFIG_PATH = os.path.join(BASE_DIR, "config", "config.yaml")
+
+# Seconds between mtime checks when hot reload is enabled (CONFIG_HOT_RELOAD=1)
+RELOAD_CHECK_INTERVAL = 2.0
+
+_lock = threading.Lock()
+# path -> (file mtime, time of last mtime check, frozen config)
+_configs: Dict[str, Tuple[float, float, Mapping[str, Any]]] = {}
+_dotenv_loaded = False
+
+
+def _freeze(value: Any) -> Any:
+    """Recursively turn dicts into read-only mappings and lists into tuples."""
+    if isinstance(value, dict):
+        return MappingProxyType({key: _freeze(item) for key, item in value.items()})
+    if isinstance(value, list):
+        return tuple(_freeze(item) for item in value)
+    return value
+
+
+def _hot_reload_enabled() -> bool:
+    return get_env("CONFIG_HOT_RELOAD", "0").lower() in ("1", "true", "yes")
+
+
+def get_config(config_path: Optional[str] = None) -> Mapping[str, Any]:
+    """
+    Return the parsed config.yaml as an immutable mapping.
+
+    The file is read and parsed once per process. With CONFIG_HOT_RELOAD=1
+    its mtime is checked every RELOAD_CHECK_INTERVAL seconds and the config
+    is re-parsed when the file changes; consumers that read settings at
+    construction time pick up changes the next time they are built.
+    """
+    path = os.path.abspath(config_path or DEFAULT_CONFIG_PATH)
+    cached = _configs.get(path)
+    now = time.monotonic()
+    if cached is not None and (now - cached[1] < RELOAD_CHECK_INTERVAL or not _hot_reload_enabled()):
+        return cached[2]
+
+    with _lock:
+        cached = _configs.get(path)
+        mtime = os.stat(path).st_mtime
+        if cached is not None and cached[0] == mtime:
+            _configs[path] = (mtime, now, cached[2])
+            return cached[2]
+        with open(path, "r") as f:
+            config = _freeze(yaml.safe_load(f) or {})
+        _configs[path] = (mtime, now, config)
+        return config
+
+
+def load_config(config_path: str = None) -> Mapping[str, Any]:
+    """Backwards-compatible alias for get_config()."""
+    return get_config(config_path)
+
+
+def get_env(name: str, default: Optional[str] = None) -> Optional[str]:
+    """Read an environment variable, loading `.env` once per process on first use."""
+    global _dotenv_loaded
+    if not _dotenv_loaded:
+        load_dotenv()
+        _dotenv_loaded = True
+    return os.environ.get(name, default)
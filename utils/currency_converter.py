@@ -1,18 +1,126 @@
+import asyncio
+import logging
+import time
 import httpx
-from dotenv import load_dotenv
-load_dotenv()
-import os
+from typing import Any, Dict, List, Optional, Tuple
+from exception.exceptions import UpstreamUnavailableError
+from utils.config_loader import get_config
+from utils.resilience import call_upstream
+from utils.http_client import get_http_client, upstream_url
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_RATE_SETTINGS = {"base_currency": "USD", "refresh_interval": 3600, "max_staleness": 86400}
 
 class CurrencyConverter:
     def __init__(self, api_key: str):
         """
         Initialize the CurrencyConverter class with the API key.
 
+        Conversions are computed locally as cross rates from a single rate
+        table (base currency from config.yaml) that is refreshed every
+        `refresh_interval` seconds and never served older than `max_staleness`.
+
         Parameters:
             api_key (str): API key from exchangerate-api.com
         """
         self.api_key = api_key
-        self.base_url = f'https://v6.exchangerate-api.com/v6/{api_key}/latest'
+        self.base_url = f"{upstream_url('exchangerate_api')}/{api_key}/latest"
+        rate_cfg = {**DEFAULT_RATE_SETTINGS, **(get_config().get("cache", {}).get("exchange_rates") or {})}
+        self.base_currency = rate_cfg["base_currency"].upper()
+        self.refresh_interval = rate_cfg["refresh_interval"]
+        self.max_staleness = rate_cfg["max_staleness"]
+        self._rates: Dict[str, float] = {}
+        self._fetched_at: Optional[float] = None
+        self._refresh_lock = asyncio.Lock()
+        self._refresher: Optional[asyncio.Task] = None
+
+    @property
+    def rates_age(self) -> Optional[float]:
+        """Seconds since the rate table was last refreshed, or None if never loaded."""
+        return None if self._fetched_at is None else time.monotonic() - self._fetched_at
+
+    async def _fetch_rates(self, api_key: str = None) -> Dict[str, float]:
+        """Download the full rate table for the base currency, trying the fallback provider if needed."""
+        effective_key = api_key or self.api_key
+        client = get_http_client()
+        # Try exchangerate-api.com first if api_key provided
+        if effective_key:
+            url = f"{upstream_url('exchangerate_api')}/{effective_key}/latest/{self.base_currency}"
+            try:
+                async def fetch_primary():
+                    response = await client.get(url)
+                    response.raise_for_status()
+                    return response
+
+                response = await call_upstream("exchangerate_api", fetch_primary, limit="exchange_rates")
+                data = response.json()
+                rates = data.get('conversion_rates') or data.get('rates')
+                if not rates:
+                    raise RuntimeError("Currency API response missing conversion rates")
+                return rates
+            except (httpx.HTTPError, asyncio.TimeoutError, UpstreamUnavailableError):
+                # fall through to fallback provider
+                pass
+
+        # Fallback: use exchangerate.host (no API key required, free)
+        try:
+            fallback_url = f"{upstream_url('exchangerate_host')}/latest?base={self.base_currency}"
+            resp2 = await call_upstream("exchangerate_host", lambda: client.get(fallback_url), limit="exchange_rates")
+            if resp2.status_code != 200:
+                try:
+                    err = resp2.json()
+                except Exception:
+                    err = resp2.text
+                raise RuntimeError(f"Fallback currency API returned status {resp2.status_code}: {err}")
+
+            rates2 = resp2.json().get('rates')
+            if not rates2:
+                raise RuntimeError("Fallback currency API response missing rates")
+            return rates2
+        except (httpx.RequestError, asyncio.TimeoutError) as e:
+            raise ConnectionError(f"Currency API requests failed: {e!r}")
+
+    async def refresh_rates(self, api_key: str = None) -> Dict[str, float]:
+        """Fetch a new rate table and make it the current one."""
+        rates = await self._fetch_rates(api_key)
+        rates = {code.upper(): float(rate) for code, rate in rates.items()}
+        rates.setdefault(self.base_currency, 1.0)
+        self._rates = rates
+        self._fetched_at = time.monotonic()
+        return rates
+
+    async def get_rates(self, api_key: str = None) -> Dict[str, float]:
+        """
+        Return the current rate table, refreshing it first if it is older than
+        `refresh_interval`. A failed refresh still serves the previous table
+        while it is within `max_staleness`.
+        """
+        age = self.rates_age
+        if age is not None and age < self.refresh_interval:
+            return self._rates
+
+        async with self._refresh_lock:
+            # Another caller may have refreshed while we waited for the lock
+            age = self.rates_age
+            if age is not None and age < self.refresh_interval:
+                return self._rates
+            try:
+                return await self.refresh_rates(api_key)
+            except Exception as e:
+                if age is not None and age < self.max_staleness:
+                    logger.warning(f"Exchange rate refresh failed, serving {int(age)}s old rates: {e}")
+                    return self._rates
+                raise
+
+    def cross_rate(self, from_currency: str, to_currency: str, rates: Dict[str, float] = None) -> float:
+        """Rate for from_currency -> to_currency derived from the base-currency table."""
+        rates = self._rates if rates is None else rates
+        if from_currency not in rates:
+            raise ValueError(f"Invalid source currency code: {from_currency}")
+        if to_currency not in rates:
+            raise ValueError(f"Invalid target currency code: {to_currency}")
+        return rates[to_currency] / rates[from_currency]
 
     async def convert(self, amount: float, from_currency: str, to_currency: str, api_key: str = None) -> float:
         """
@@ -27,42 +135,63 @@ class CurrencyConverter:
         Returns:
             The converted amount if successful, None otherwise
         """
-        effective_key = api_key or self.api_key
-        async with httpx.AsyncClient() as client:
-            # Try exchangerate-api.com first if api_key provided
-            if effective_key:
-                url = f"https://v6.exchangerate-api.com/v6/{effective_key}/latest/{from_currency}"
-                try:
-                    response = await client.get(url, timeout=10)
-                    if response.status_code == 200:
-                        data = response.json()
-                        rates = data.get('conversion_rates') or data.get('rates')
-                        if not rates:
-                            raise RuntimeError("Currency API response missing conversion rates")
-                        if to_currency not in rates:
-                            raise ValueError(f"Invalid target currency code: {to_currency}")
-                        rate = rates[to_currency]
-                        return amount * rate
-                except httpx.RequestError:
-                    # fall through to fallback provider
-                    pass
-
-            # Fallback: use exchangerate.host (no API key required, free)
+        from_currency = from_currency.strip().upper()
+        to_currency = to_currency.strip().upper()
+        if from_currency == to_currency:
+            return amount
+        rates = await self.get_rates(api_key)
+        return amount * self.cross_rate(from_currency, to_currency, rates)
+
+    async def convert_many(self, items: List[Tuple[float, str, str]], api_key: str = None) -> List[Dict[str, Any]]:
+        """
+        Convert several (amount, from_currency, to_currency) items against one rate table.
+
+        Returns:
+            One dict per item with the converted amount, or an `error` for items
+            whose currency codes are invalid.
+        """
+        rates = await self.get_rates(api_key)
+        results = []
+        for amount, from_currency, to_currency in items:
+            from_currency = from_currency.strip().upper()
+            to_currency = to_currency.strip().upper()
+            result = {"amount": amount, "from_currency": from_currency, "to_currency": to_currency}
+            try:
+                rate = 1.0 if from_currency == to_currency else self.cross_rate(from_currency, to_currency, rates)
+                result["converted_amount"] = round(amount * rate, 2)
+            except ValueError as e:
+                result["error"] = str(e)
+            results.append(result)
+        return results
+
+    async def _refresh_forever(self) -> None:
+        while True:
+            age = self.rates_age
+            if age is not None and age < self.refresh_interval:
+                # Still fresh (e.g. a request refreshed it): wake up when this table is due
+                await asyncio.sleep(self.refresh_interval - age)
+                continue
+            try:
+                # Same lock as get_rates, so a request and the timer never fetch the table twice
+                async with self._refresh_lock:
+                    age = self.rates_age
+                    if age is None or age >= self.refresh_interval:
+                        await self.refresh_rates()
+                        logger.info(f"Refreshed exchange rate table ({len(self._rates)} currencies, base {self.base_currency})")
+            except Exception as e:
+                logger.warning(f"Background exchange rate refresh failed: {e}")
+            await asyncio.sleep(self.refresh_interval)
+
+    def start_background_refresh(self) -> None:
+        """Start refreshing the rate table on a timer from the running event loop."""
+        if self._refresher is None or self._refresher.done():
+            self._refresher = asyncio.get_running_loop().create_task(self._refresh_forever())
+
+    async def stop_background_refresh(self) -> None:
+        if self._refresher is not None:
+            self._refresher.cancel()
             try:
-                fallback_url = f"https://api.exchangerate.host/latest?base={from_currency}&symbols={to_currency}"
-                resp2 = await client.get(fallback_url, timeout=10)
-                if resp2.status_code != 200:
-                    try:
-                        err = resp2.json()
-                    except Exception:
-                        err = resp2.text
-                    raise RuntimeError(f"Fallback currency API returned status {resp2.status_code}: {err}")
-
-                data2 = resp2.json()
-                rates2 = data2.get('rates')
-                if not rates2 or to_currency not in rates2:
-                    raise ValueError(f"Invalid target currency code or missing rate from fallback provider: {to_currency}")
-                rate2 = rates2[to_currency]
-                return amount * rate2
-            except httpx.RequestError as e:
-                raise ConnectionError(f"Currency API requests failed: {e}")
+                await self._refresher
+            except asyncio.CancelledError:
+                pass
+            self._refresher = None
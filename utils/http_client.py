@@ -0,0 +1,215 @@
+import asyncio
+import importlib.util
+import logging
+import time
+from collections import defaultdict
+from typing import Any, Dict, List, Optional
+
+import httpx
+
+from utils.config_loader import get_config, get_env
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_HTTP_SETTINGS = {
+    "http2": True,
+    "timeout": {"connect": 5.0, "read": 10.0, "write": 10.0, "pool": 5.0},
+    "limits": {
+        "max_connections": 100,
+        "max_keepalive_connections": 20,
+        "keepalive_expiry": 30.0,
+        "max_connections_per_host": 10,
+    },
+}
+
+# Public endpoints of each upstream API; see upstream_url()
+DEFAULT_UPSTREAM_URLS = {
+    "openweathermap": "http://api.openweathermap.org/data/2.5",
+    "exchangerate_api": "https://v6.exchangerate-api.com/v6",
+    "exchangerate_host": "https://api.exchangerate.host",
+    "serpapi": "https://serpapi.com",
+    "tavily": "https://api.tavily.com",
+}
+
+# Upstreams reached through the shared client whose connections each worker opens at startup
+DEFAULT_WARMUP_SETTINGS = {"enabled": True, "upstreams": ["openweathermap", "exchangerate_api"], "timeout": 5.0}
+
+_client: Optional[httpx.AsyncClient] = None
+_client_loop: Optional[asyncio.AbstractEventLoop] = None
+# Clients replaced by get_http_client() on a loop change that still need closing
+_stale_clients: List[httpx.AsyncClient] = []
+
+
+def http_client_settings() -> dict:
+    """Return the `http` section of config.yaml merged over the defaults."""
+    try:
+        configured = get_config().get("http") or {}
+    except Exception:
+        logger.exception("Could not read http settings from config.yaml, using defaults")
+        configured = {}
+    return {
+        "http2": configured.get("http2", DEFAULT_HTTP_SETTINGS["http2"]),
+        "timeout": {**DEFAULT_HTTP_SETTINGS["timeout"], **(configured.get("timeout") or {})},
+        "limits": {**DEFAULT_HTTP_SETTINGS["limits"], **(configured.get("limits") or {})},
+    }
+
+
+def upstream_url(name: str) -> str:
+    """
+    Base URL (no trailing slash) for upstream `name`: the <NAME>_BASE_URL
+    environment variable, else `upstream_urls.<name>` in config.yaml, else
+    the public endpoint. Lets benchmarks and staging point at local stubs.
+    """
+    url = get_env(f"{name.upper()}_BASE_URL") or (get_config().get("upstream_urls") or {}).get(name) or DEFAULT_UPSTREAM_URLS[name]
+    return url.rstrip("/")
+
+
+class _ReleasingStream(httpx.AsyncByteStream):
+    """Response body wrapper that frees the per-host slot once the body is closed."""
+
+    def __init__(self, stream: httpx.AsyncByteStream, release):
+        self._stream = stream
+        self._release = release
+
+    async def __aiter__(self):
+        async for chunk in self._stream:
+            yield chunk
+
+    async def aclose(self) -> None:
+        try:
+            await self._stream.aclose()
+        finally:
+            self._release()
+
+
+class HostLimitedTransport(httpx.AsyncBaseTransport):
+    """
+    Transport that caps the number of in-flight requests per upstream host.
+
+    httpx only offers a global connection limit, so a slow provider could
+    otherwise starve every other upstream of pooled connections.
+    """
+
+    def __init__(self, transport: httpx.AsyncBaseTransport, max_per_host: int):
+        self._transport = transport
+        self._max_per_host = max_per_host
+        self._semaphores: Dict[str, asyncio.Semaphore] = defaultdict(
+            lambda: asyncio.Semaphore(self._max_per_host)
+        )
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        semaphore = self._semaphores[request.url.host]
+        await semaphore.acquire()
+        released = False
+
+        def release():
+            nonlocal released
+            if not released:
+                released = True
+                semaphore.release()
+
+        try:
+            response = await self._transport.handle_async_request(request)
+        except BaseException:
+            release()
+            raise
+        response.stream = _ReleasingStream(response.stream, release)
+        return response
+
+    async def aclose(self) -> None:
+        await self._transport.aclose()
+
+
+def _build_client() -> httpx.AsyncClient:
+    settings = http_client_settings()
+    limits_cfg = settings["limits"]
+    # HTTP/2 needs the optional `h2` package; fall back to HTTP/1.1 keep-alive without it
+    http2 = bool(settings["http2"]) and importlib.util.find_spec("h2") is not None
+
+    limits = httpx.Limits(
+        max_connections=limits_cfg["max_connections"],
+        max_keepalive_connections=limits_cfg["max_keepalive_connections"],
+        keepalive_expiry=limits_cfg["keepalive_expiry"],
+    )
+    transport = httpx.AsyncHTTPTransport(http2=http2, limits=limits)
+    max_per_host = limits_cfg.get("max_connections_per_host")
+    if max_per_host:
+        transport = HostLimitedTransport(transport, int(max_per_host))
+
+    logger.info(f"Opening shared HTTP client (http2={http2}, limits={limits_cfg})")
+    return httpx.AsyncClient(transport=transport, timeout=httpx.Timeout(**settings["timeout"]))
+
+
+def get_http_client() -> httpx.AsyncClient:
+    """
+    Return the process-wide pooled AsyncClient, creating it on first use.
+
+    The client is bound to the event loop that created it; if called from a
+    different loop (scripts, tests using asyncio.run) a fresh client is built.
+    """
+    global _client, _client_loop
+    try:
+        loop = asyncio.get_running_loop()
+    except RuntimeError:
+        loop = None
+
+    if _client is None or _client.is_closed or (loop is not None and _client_loop is not loop):
+        if _client is not None and not _client.is_closed:
+            _retire_client(_client, _client_loop)
+        _client = _build_client()
+        _client_loop = loop
+    return _client
+
+
+def _retire_client(client: httpx.AsyncClient, loop: Optional[asyncio.AbstractEventLoop]) -> None:
+    """Close a client left behind by another event loop, or keep it for close_http_client()."""
+    if loop is not None and loop.is_running():
+        # Still running in another thread: close it there
+        asyncio.run_coroutine_threadsafe(client.aclose(), loop)
+    elif loop is None or not loop.is_closed():
+        _stale_clients.append(client)
+    else:
+        logger.warning(
+            "Replacing a shared HTTP client whose event loop closed without close_http_client(); "
+            "its connections are only released when it is garbage collected"
+        )
+
+
+async def close_http_client() -> None:
+    """Close the shared client and any it replaced, releasing their pooled connections."""
+    global _client, _client_loop
+    client, _client, _client_loop = _client, None, None
+    stale = list(_stale_clients)
+    _stale_clients.clear()
+    for old in stale:
+        try:
+            await old.aclose()
+        except Exception:
+            logger.warning("Could not close a replaced HTTP client", exc_info=True)
+    if client is not None and not client.is_closed:
+        await client.aclose()
+
+
+async def warm_up_connections() -> Dict[str, Dict[str, Any]]:
+    """
+    Open a pooled connection to each upstream in config.yaml `warmup`, so
+    the first real call skips DNS, TCP and TLS setup. Any HTTP response
+    counts (the base URLs are not API endpoints); failures are reported,
+    not raised.
+    """
+    cfg = {**DEFAULT_WARMUP_SETTINGS, **(get_config().get("warmup") or {})}
+    if not cfg["enabled"]:
+        return {}
+    client = get_http_client()
+
+    async def touch(name: str) -> Dict[str, Any]:
+        start = time.perf_counter()
+        try:
+            await client.head(f"{upstream_url(name)}/", timeout=cfg["timeout"])
+        except Exception as e:
+            # Includes configuration mistakes such as an invalid <NAME>_BASE_URL
+            return {"connected": False, "error": f"{type(e).__name__}: {e}"}
+        return {"connected": True, "ms": round((time.perf_counter() - start) * 1000, 1)}
+
+    names = list(cfg["upstreams"])
+    return dict(zip(names, await asyncio.gather(*(touch(name) for name in names))))
@@ -0,0 +1,197 @@
+import asyncio
+import contextlib
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+from exception.exceptions import BaseAppException, JobQueueFullError
+from utils.config_loader import BASE_DIR, get_config
+from utils.logging_setup import bind_log_context
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_JOB_SETTINGS = {
+    "path": "data/jobs.sqlite3",
+    "max_concurrent": 4,
+    "max_pending": 100,
+    "run_timeout": 600,
+    "result_ttl": 3600,
+    "max_wait": 30,
+}
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id TEXT PRIMARY KEY,
+    status TEXT NOT NULL,
+    thread_id TEXT,
+    result TEXT,
+    error TEXT,
+    status_code INTEGER,
+    created_at REAL NOT NULL,
+    updated_at REAL NOT NULL,
+    expires_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS jobs_expires ON jobs (expires_at);
+"""
+
+FINISHED = ("succeeded", "failed")
+
+
+class JobStore:
+    """
+    SQLite (WAL) table of background job status and results.
+
+    Every gunicorn worker reads the same file, so a job submitted to one
+    worker can be polled through any other. Rows expire `result_ttl`
+    seconds after their last update.
+    """
+
+    def __init__(self, path: str, result_ttl: float = 3600):
+        self.path = path if os.path.isabs(path) else os.path.join(BASE_DIR, path)
+        self.result_ttl = result_ttl
+        self._local = threading.local()
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        # Not kept open: this may run in a gunicorn master (preload_app) whose connections must not reach forked workers
+        with contextlib.closing(sqlite3.connect(self.path, timeout=10)) as conn:
+            conn.executescript(_SCHEMA)
+
+    def _connection(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=10, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def create(self, job_id: str, thread_id: Optional[str]) -> None:
+        now = time.time()
+        conn = self._connection()
+        conn.execute("DELETE FROM jobs WHERE expires_at <= ?", (now,))
+        conn.execute(
+            "INSERT INTO jobs (id, status, thread_id, created_at, updated_at, expires_at) VALUES (?, 'queued', ?, ?, ?, ?)",
+            (job_id, thread_id, now, now, now + self.result_ttl),
+        )
+
+    def update(self, job_id: str, status: str, result: Any = None, error: Optional[str] = None,
+               status_code: Optional[int] = None) -> None:
+        now = time.time()
+        self._connection().execute(
+            "UPDATE jobs SET status = ?, result = ?, error = ?, status_code = ?, updated_at = ?, expires_at = ? WHERE id = ?",
+            (status, json.dumps(result) if result is not None else None, error, status_code, now, now + self.result_ttl, job_id),
+        )
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        row = self._connection().execute(
+            "SELECT id, status, thread_id, result, error, status_code, created_at, updated_at FROM jobs "
+            "WHERE id = ? AND expires_at > ?",
+            (job_id, time.time()),
+        ).fetchone()
+        if row is None:
+            return None
+        job = dict(zip(("job_id", "status", "thread_id", "result", "error", "status_code", "created_at", "updated_at"), row))
+        job["result"] = json.loads(job["result"]) if job["result"] else None
+        return job
+
+
+class JobManager:
+    """
+    Runs long agent requests in a bounded pool of background tasks.
+
+    At most `max_concurrent` jobs run at once in this worker and at most
+    `max_pending` may be queued or running; further submissions are
+    rejected with JobQueueFullError. Jobs keep running if the client
+    disconnects, and their results stay in the JobStore until they expire.
+    """
+
+    POLL_INTERVAL = 0.25
+
+    def __init__(self, store: JobStore, max_concurrent: int = 4, max_pending: int = 100,
+                 run_timeout: float = 600, max_wait: float = 30):
+        self.store = store
+        self.max_concurrent = max_concurrent
+        self.max_pending = max_pending
+        self.run_timeout = run_timeout
+        self.max_wait = max_wait
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._tasks: Dict[str, asyncio.Task] = {}
+        self._done: Dict[str, asyncio.Event] = {}
+
+    @classmethod
+    def from_config(cls) -> "JobManager":
+        cfg = {**DEFAULT_JOB_SETTINGS, **(get_config().get("jobs") or {})}
+        return cls(
+            JobStore(cfg["path"], result_ttl=cfg["result_ttl"]),
+            max_concurrent=cfg["max_concurrent"],
+            max_pending=cfg["max_pending"],
+            run_timeout=cfg["run_timeout"],
+            max_wait=cfg["max_wait"],
+        )
+
+    async def submit(self, run: Callable[[], Awaitable[Dict[str, Any]]], thread_id: Optional[str] = None) -> str:
+        """Queue `run` and return its job id immediately."""
+        if len(self._tasks) >= self.max_pending:
+            raise JobQueueFullError()
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.max_concurrent)
+
+        job_id = uuid.uuid4().hex
+        await asyncio.to_thread(self.store.create, job_id, thread_id)
+        self._done[job_id] = asyncio.Event()
+        self._tasks[job_id] = asyncio.create_task(self._run(job_id, run))
+        return job_id
+
+    async def _run(self, job_id: str, run: Callable[[], Awaitable[Dict[str, Any]]]) -> None:
+        bind_log_context(job_id=job_id)
+        try:
+            async with self._semaphore:
+                await asyncio.to_thread(self.store.update, job_id, "running")
+                result = await asyncio.wait_for(run(), timeout=self.run_timeout)
+            await asyncio.to_thread(self.store.update, job_id, "succeeded", result=result)
+        except asyncio.TimeoutError:
+            logger.warning(f"Job {job_id} exceeded {self.run_timeout}s")
+            await asyncio.to_thread(self.store.update, job_id, "failed", error="The plan took too long to generate.", status_code=504)
+        except asyncio.CancelledError:
+            await asyncio.to_thread(self.store.update, job_id, "failed", error="The server restarted before the plan finished.", status_code=503)
+            raise
+        except BaseAppException as e:
+            await asyncio.to_thread(self.store.update, job_id, "failed", error=e.message, status_code=e.status_code)
+        except Exception:
+            logger.exception(f"Job {job_id} failed")
+            await asyncio.to_thread(self.store.update, job_id, "failed", error="An internal server error occurred.", status_code=500)
+        finally:
+            self._tasks.pop(job_id, None)
+            self._done.pop(job_id).set()
+
+    async def wait(self, job_id: str, timeout: float = 0) -> Optional[Dict[str, Any]]:
+        """Current job record, long-polling up to `timeout` seconds for it to finish."""
+        deadline = time.monotonic() + min(max(timeout, 0), self.max_wait)
+        while True:
+            job = await asyncio.to_thread(self.store.get, job_id)
+            remaining = deadline - time.monotonic()
+            if job is None or job["status"] in FINISHED or remaining <= 0:
+                return job
+            done = self._done.get(job_id)
+            if done is not None:
+                # Running in this worker: wake up as soon as it finishes
+                try:
+                    await asyncio.wait_for(done.wait(), timeout=remaining)
+                except asyncio.TimeoutError:
+                    pass
+            else:
+                await asyncio.sleep(min(self.POLL_INTERVAL, remaining))
+
+    async def shutdown(self) -> None:
+        """Cancel jobs still running in this worker; they are recorded as failed."""
+        tasks = list(self._tasks.values())
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    def stats(self) -> Dict[str, Any]:
+        return {"name": "jobs", "pending": len(self._tasks), "max_pending": self.max_pending, "max_concurrent": self.max_concurrent}
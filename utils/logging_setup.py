@@ -0,0 +1,218 @@
+import atexit
+import contextlib
+import contextvars
+import copy
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import threading
+from datetime import datetime, timezone
+from typing import Any, Dict, Optional
+
+from utils.config_loader import BASE_DIR, get_config
+
+DEFAULT_LOGGING_SETTINGS = {
+    "level": "INFO",
+    "file": "logs/server.log",
+    "file_format": "json",
+    "console_format": "text",
+    "max_bytes": 10 * 1024 * 1024,
+    "backup_count": 5,
+    "sample_every": {},
+    "capture": ["uvicorn", "uvicorn.error", "uvicorn.access", "gunicorn.error", "gunicorn.access"],
+}
+
+TEXT_FORMAT = "%(asctime)s - %(name)s - %(levelname)s - %(message)s"
+
+# Fields attached to every record logged while handling a request (request_id, thread_id)
+_log_context: contextvars.ContextVar[Dict[str, str]] = contextvars.ContextVar("log_context", default={})
+
+_listener: Optional[logging.handlers.QueueListener] = None
+_settings: Dict[str, Any] = {}
+_queue_handler: Optional[logging.handlers.QueueHandler] = None
+_configure_lock = threading.Lock()
+
+
+def bind_log_context(**fields: Optional[str]) -> None:
+    """Add fields to the log context of the current task (and of tasks it starts)."""
+    _log_context.set({**_log_context.get(), **{k: v for k, v in fields.items() if v is not None}})
+
+
+@contextlib.contextmanager
+def log_context(**fields: Optional[str]):
+    """Scoped bind_log_context."""
+    token = _log_context.set({**_log_context.get(), **{k: v for k, v in fields.items() if v is not None}})
+    try:
+        yield
+    finally:
+        _log_context.reset(token)
+
+
+class ContextFilter(logging.Filter):
+    """Copies the caller's log context onto the record before it leaves the calling thread."""
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        for key, value in _log_context.get().items():
+            setattr(record, key, value)
+        return True
+
+
+class SamplingFilter(logging.Filter):
+    """
+    Keeps 1 in N records below WARNING for the configured loggers (and their
+    children), e.g. {"Agent.agentic_workflow": 10}. Warnings and errors are
+    never dropped.
+    """
+
+    def __init__(self, sample_every: Dict[str, int]):
+        super().__init__()
+        self.sample_every = {name: int(every) for name, every in sample_every.items() if int(every) > 1}
+        self._seen: Dict[str, int] = {}
+
+    def _rule(self, name: str) -> Optional[str]:
+        while name:
+            if name in self.sample_every:
+                return name
+            name = name.rpartition(".")[0]
+        return None
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno >= logging.WARNING or not self.sample_every:
+            return True
+        rule = self._rule(record.name)
+        if rule is None:
+            return True
+        seen = self._seen.get(rule, 0)
+        self._seen[rule] = seen + 1
+        return seen % self.sample_every[rule] == 0
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line: ts, level, logger, message, plus request_id/thread_id when bound."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry: Dict[str, Any] = {
+            "ts": datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        for key in ("request_id", "thread_id", "job_id"):
+            value = getattr(record, key, None)
+            if value is not None:
+                entry[key] = value
+        if record.exc_info:
+            entry["exc_info"] = self.formatException(record.exc_info)
+        elif record.exc_text:
+            entry["exc_info"] = record.exc_text
+        return json.dumps(entry, ensure_ascii=False)
+
+
+class _QueueHandler(logging.handlers.QueueHandler):
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # Render the message and traceback on the calling thread (args and frames may change later),
+        # but keep the traceback separate so JsonFormatter can put it in its own field
+        record = copy.copy(record)
+        record.msg = record.message = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+
+def _formatter(kind: str) -> logging.Formatter:
+    return JsonFormatter() if kind == "json" else logging.Formatter(TEXT_FORMAT)
+
+
+def capture_server_loggers(names=None) -> None:
+    """
+    Send uvicorn/gunicorn loggers through the root queue handler. They install
+    their own handlers, and gunicorn's uvicorn worker does so after the app is
+    imported when preload_app is on, so the worker calls this again.
+    """
+    names = names or {**DEFAULT_LOGGING_SETTINGS, **(get_config().get("logging") or {})}["capture"]
+    for name in names:
+        captured = logging.getLogger(name)
+        captured.handlers = []
+        captured.propagate = True
+
+
+def _stop_listener() -> None:
+    if _listener is not None:
+        _listener.stop()
+
+
+def _restart_after_fork() -> None:
+    # The listener thread does not survive fork (e.g. gunicorn workers forked from a
+    # preloaded master): give the child its own queue and listener over the same handlers
+    global _listener
+    if _listener is None:
+        return
+    # The file is per process too: the parent's handler keeps rotating the parent's file
+    handlers = [h for h in _listener.handlers if not isinstance(h, logging.handlers.RotatingFileHandler)]
+    if _settings["file"]:
+        handlers.append(_file_handler(_settings))
+    log_queue: "queue.SimpleQueue[logging.LogRecord]" = queue.SimpleQueue()
+    _queue_handler.queue = log_queue
+    _listener = logging.handlers.QueueListener(log_queue, *handlers, respect_handler_level=True)
+    _listener.start()
+
+
+def _file_handler(cfg: Dict[str, Any]) -> logging.handlers.RotatingFileHandler:
+    """
+    Rotating handler for this process's own file, `file` with the pid before
+    the extension (logs/server.1234.log): processes sharing one rotating file
+    would each rotate it on their own and lose records.
+    """
+    path = cfg["file"] if os.path.isabs(cfg["file"]) else os.path.join(BASE_DIR, cfg["file"])
+    base, ext = os.path.splitext(path)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    handler = logging.handlers.RotatingFileHandler(
+        f"{base}.{os.getpid()}{ext}", maxBytes=cfg["max_bytes"], backupCount=cfg["backup_count"],
+        encoding="utf-8", delay=True,
+    )
+    handler.setFormatter(_formatter(cfg["file_format"]))
+    return handler
+
+
+def configure_logging() -> Optional[logging.handlers.QueueListener]:
+    """
+    Route all logging through a queue drained by a background thread.
+
+    Callers (including the event loop) only enqueue records; formatting and
+    the rotating-file and console writes happen on the listener thread.
+    Each process (gunicorn master and workers) writes its own file.
+    Settings come from the `logging` section of config.yaml. Safe to call
+    more than once per process: only the first call configures anything.
+    """
+    global _listener, _queue_handler, _settings
+    with _configure_lock:
+        if _listener is not None:
+            return _listener
+        cfg = _settings = {**DEFAULT_LOGGING_SETTINGS, **(get_config().get("logging") or {})}
+
+        handlers = []
+        console = logging.StreamHandler()
+        console.setFormatter(_formatter(cfg["console_format"]))
+        handlers.append(console)
+        if cfg["file"]:
+            handlers.append(_file_handler(cfg))
+
+        log_queue: "queue.SimpleQueue[logging.LogRecord]" = queue.SimpleQueue()
+        _queue_handler = _QueueHandler(log_queue)
+        _queue_handler.addFilter(SamplingFilter(cfg["sample_every"] or {}))
+        _queue_handler.addFilter(ContextFilter())
+
+        root = logging.getLogger()
+        root.handlers = [_queue_handler]
+        root.setLevel(cfg["level"])
+        capture_server_loggers(cfg["capture"])
+
+        _listener = logging.handlers.QueueListener(log_queue, *handlers, respect_handler_level=True)
+        _listener.start()
+        atexit.register(_stop_listener)
+        os.register_at_fork(after_in_child=_restart_after_fork)
+        return _listener
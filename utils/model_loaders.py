@@ -1,15 +1,14 @@
-import os
-from dotenv import load_dotenv
+import logging
 from typing import Literal, Optional, Any
 from pydantic import BaseModel, Field
-from langchain.chat_models import init_chat_model # Universal factory
-from utils.config_loader import load_config
+from utils.config_loader import get_config, get_env
 
-load_dotenv()
+logger = logging.getLogger(__name__)
 
 class ConfigLoader:
+    """Thin accessor over the process-wide, parse-once config (see utils.config_loader.get_config)."""
     def __init__(self):
-        self.config = load_config()
+        self.config = get_config()
         
     def __getitem__(self, key):
         return self.config[key]
@@ -26,14 +25,14 @@ class ModelLoader(BaseModel):
         
     # In model_loader.py
     def load_llm(self, api_key: Optional[str] = None):
-        print(f"--- Loading LLM Provider: {self.model_provider} ---")
+        logger.info(f"Loading LLM provider: {self.model_provider}")
         try:
             if not self.config:
                  self.config = ConfigLoader()
                  
             model_cfg = self.config['llm'].get(self.model_provider)
             if not model_cfg:
-                print(f"⚠️ Provider '{self.model_provider}' not found in config.yaml. Falling back to 'google'.")
+                logger.warning(f"Provider '{self.model_provider}' not found in config.yaml. Falling back to 'google'.")
                 self.model_provider = "google"
                 model_cfg = self.config['llm']['google']
 
@@ -51,17 +50,19 @@ class ModelLoader(BaseModel):
             }
             if base_url:
                 kwargs["base_url"] = base_url
+            if "max_retries" in model_cfg:
+                kwargs["max_retries"] = model_cfg["max_retries"]
 
             # Map specific providers to their env vars if using generic clients
             if self.model_provider == "deepseek":
-                 kwargs["api_key"] = os.getenv("DEEPSEEK_API_KEY")
+                 kwargs["api_key"] = get_env("DEEPSEEK_API_KEY")
             elif self.model_provider == "mistral":
-                 kwargs["api_key"] = os.getenv("MISTRAL_API_KEY")
+                 kwargs["api_key"] = get_env("MISTRAL_API_KEY")
 
             if self.model_provider == "groq":
-                 api_key = api_key or os.getenv("GROQ_API_KEY")
+                 api_key = api_key or get_env("GROQ_API_KEY")
                  if not api_key:
-                     print("⚠️ GROQ_API_KEY not found. Server starting in BYOK mode only.")
+                     logger.warning("GROQ_API_KEY not found. Server starting in BYOK mode only.")
                      # Return a dummy or None; the agent_function must handle this.
                      return None
                      
@@ -70,13 +71,16 @@ class ModelLoader(BaseModel):
                      model=model_name, 
                      api_key=api_key,
                      temperature=0.0,
-                     max_retries=5,
+                     # Retries multiply load during provider throttling; upstream limits handle back-pressure
+                     max_retries=model_cfg.get("max_retries", 2),
                  )
             
             # For other providers via init_chat_model
             if api_key:
                 kwargs["api_key"] = api_key
                 
+            # Universal factory; imported here so only the configured provider's SDK is ever loaded
+            from langchain.chat_models import init_chat_model
             llm = init_chat_model(**kwargs)
 
             return llm
@@ -84,5 +88,5 @@ class ModelLoader(BaseModel):
         except KeyError:
             raise ValueError(f"Provider '{self.model_provider}' not found in config.yaml")
         except Exception as e:
-            print(f"Error loading model: {e}")
+            logger.error(f"Error loading model: {e}")
             raise
\ No newline at end of file
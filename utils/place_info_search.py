@@ -1,14 +1,19 @@
 import os
+import re
 import json
 import asyncio
 from typing import Any, Dict
-try:
-    from langchain_community.utilities import SerpAPIWrapper
-except ImportError:
-    SerpAPIWrapper = None
-from langchain_tavily import TavilySearch
-from dotenv import load_dotenv
-load_dotenv()
+from exception.exceptions import ProviderAPIError, UpstreamUnavailableError
+from utils.client_registry import ClientRegistry
+from utils.config_loader import get_config
+from utils.http_client import upstream_url
+from utils.resilience import RETRYABLE_STATUS
+
+# Search clients are built once per (provider, api key) and reused across requests
+search_clients = ClientRegistry(
+    maxsize=((get_config().get("client_registry") or {}).get("search") or {}).get("max_entries", 64),
+    name="search_clients",
+)
 
 # Known parked or junk domains that often appear in search results for dead businesses
 JUNK_DOMAINS = [
@@ -26,25 +31,58 @@ def is_junk_link(link: str) -> bool:
         return True
     return any(domain in link.lower() for domain in JUNK_DOMAINS)
 
+# Search backends are imported on first use: only the active one is ever loaded, and
+# langchain_tavily (with aiohttp) alone is a large share of the server's import time
+def serpapi_wrapper_class():
+    """langchain_community's SerpAPIWrapper, or None if it is not installed."""
+    try:
+        from langchain_community.utilities import SerpAPIWrapper
+    except ImportError:
+        return None
+    return SerpAPIWrapper
+
+def tavily_search_class():
+    from langchain_tavily import TavilySearch
+    return TavilySearch
+
+def _serpapi_wrapper(api_key: str):
+    """SerpAPIWrapper whose searches go to upstream_url("serpapi")."""
+    wrapper = serpapi_wrapper_class()(serpapi_api_key=api_key)
+    backend = upstream_url("serpapi")
+    if backend != wrapper.search_engine.BACKEND:
+        wrapper.search_engine = type(wrapper.search_engine.__name__, (wrapper.search_engine,), {"BACKEND": backend})
+    return wrapper
+
+def _serp_results(wrapper, query: str) -> dict:
+    """
+    SerpAPIWrapper.results without its HiddenPrints block, which swaps
+    sys.stdout process-wide and can leave it closed when searches run
+    concurrently in threads.
+    """
+    return wrapper.search_engine(wrapper.get_params(query)).get_dict()
+
+def _serp_text(wrapper, query: str) -> str:
+    """SerpAPIWrapper.run equivalent built on _serp_results."""
+    return wrapper._process_response(_serp_results(wrapper, query))
+
 class SerpAPISearchTool:
     def __init__(self, api_key: str):
-        if SerpAPIWrapper is None:
+        if serpapi_wrapper_class() is None:
             raise ImportError("SerpAPI not available. Install with: pip install google-search-results")
-        self.search_wrapper = SerpAPIWrapper(serpapi_api_key=api_key)
+        self.search_wrapper = _serpapi_wrapper(api_key)
+
+    def _wrapper(self, api_key: str = None):
+        """Wrapper for a BYOK key (built once per key), or the server's default wrapper."""
+        if api_key:
+            return search_clients.get_or_create("serpapi", api_key, lambda: _serpapi_wrapper(api_key))
+        return self.search_wrapper
 
     async def _format_serp_results(self, search_query: str, api_key: str = None) -> str:
         """Helper to run search and format results with links"""
-        # Use provided api_key or fall back to the one from __init__
-        effective_key = api_key or getattr(self.search_wrapper, "serpapi_api_key", None)
-        
-        # If we have a custom key, we need a separate wrapper or local call
-        if api_key and SerpAPIWrapper:
-            wrapper = SerpAPIWrapper(serpapi_api_key=api_key)
-        else:
-            wrapper = self.search_wrapper
+        wrapper = self._wrapper(api_key)
 
         # SerpAPIWrapper.results is blocking, so we run it in a thread
-        results = await asyncio.to_thread(wrapper.results, search_query)
+        results = await asyncio.to_thread(_serp_results, wrapper, search_query)
         formatted_results = []
         
         # Check organic results
@@ -64,7 +102,7 @@ class SerpAPISearchTool:
                 formatted_results.append(f"{title}: {link}")
 
         if not formatted_results:
-             return await asyncio.to_thread(wrapper.run, search_query) # Fallback to string
+             return wrapper._process_response(results) # Fallback to string, from the same response
         
         # Sort to prioritize certain high-quality domains like Tripadvisor, Zomato, Official sites
         # but for now, just filtering junk out is enough.
@@ -97,19 +135,30 @@ class SerpAPISearchTool:
         """
         Search for top activities in and around a given place.
         """
-        wrapper = SerpAPIWrapper(serpapi_api_key=api_key) if api_key and SerpAPIWrapper else self.search_wrapper
-        return await asyncio.to_thread(wrapper.run, f"top activities in and around {place}")
+        wrapper = self._wrapper(api_key)
+        return await asyncio.to_thread(_serp_text, wrapper, f"top activities in and around {place}")
 
     async def search_transportation(self, place: str, api_key: str = None) -> str:
         """
         Searches for available modes of transportation in and around a given place.
         """
-        wrapper = SerpAPIWrapper(serpapi_api_key=api_key) if api_key and SerpAPIWrapper else self.search_wrapper
-        return await asyncio.to_thread(wrapper.run, f"modes of transportation in and around {place}")
+        wrapper = self._wrapper(api_key)
+        return await asyncio.to_thread(_serp_text, wrapper, f"modes of transportation in and around {place}")
 
 class TavilySearchTool:
     def __init__(self, api_key: str):
         self.api_key = api_key
+
+    def _client(self, api_key: str = None):
+        """Shared TavilySearch client for the effective key (BYOK or server key)."""
+        effective_key = api_key or self.api_key
+        return search_clients.get_or_create(
+            "tavily",
+            effective_key,
+            lambda: tavily_search_class()(
+                tavily_api_key=effective_key, api_base_url=upstream_url("tavily"), topic="general", search_depth='advanced'
+            ),
+        )
     
     def _format_tavily_results(self, result: Any) -> str:
         """Helper to format Tavily results into Name: URL string"""
@@ -132,42 +181,49 @@ class TavilySearchTool:
                 return "\n".join(clean_formatted[:5]) if clean_formatted else "\n".join(formatted[:2])
         return str(result)
 
+    async def _search(self, query: str, api_key: str = None) -> str:
+        """
+        Run one Tavily search and format it. TavilySearch reports API and
+        network failures as an {"error": ...} result instead of raising;
+        those are raised here so they are retried and never cached.
+        """
+        result = await self._client(api_key).ainvoke({"query": query})
+        if isinstance(result, dict) and "error" in result:
+            error = result["error"]
+            cause = error if isinstance(error, BaseException) else None
+            status = re.match(r"Error (\d+)", str(error))
+            if status and int(status.group(1)) not in RETRYABLE_STATUS:
+                # Tavily answered (bad key, quota, bad request): not an outage worth retrying
+                raise ProviderAPIError(f"Tavily search failed: {error}", status_code=int(status.group(1))) from cause
+            raise UpstreamUnavailableError(f"Tavily search failed: {error}") from cause
+        return self._format_tavily_results(result)
+
     async def search_attractions(self, place: str, api_key: str = None) -> str:
         """
         Search for top attractions in and around a given place.
         """
-        tavily_tool = TavilySearch(tavily_api_key=api_key or self.api_key, topic="general", search_depth='advanced')
-        result = await tavily_tool.ainvoke({"query": f"verified top attractions and landmarks in {place} official website"})
-        return self._format_tavily_results(result)
+        return await self._search(f"verified top attractions and landmarks in {place} official website", api_key=api_key)
 
     async def tavily_search_restaurants(self, place: str, api_key: str = None) -> str:
         """
         Search for top restaurants in and around a given place.
         """
-        tavily_tool = TavilySearch(tavily_api_key=api_key or self.api_key, topic="general", search_depth='advanced')
-        result = await tavily_tool.ainvoke({"query": f"top rated restaurants in {place} official website zomato tripadvisor"})
-        return self._format_tavily_results(result)
+        return await self._search(f"top rated restaurants in {place} official website zomato tripadvisor", api_key=api_key)
 
     async def tavily_search_activity(self, place: str, api_key: str = None) -> str:
         """
         Search for top activities in and around a given place.
         """
-        tavily_tool = TavilySearch(tavily_api_key=api_key or self.api_key, topic="general", search_depth='advanced')
-        result = await tavily_tool.ainvoke({"query": f"tourist activities and experiences in {place} verified links"})
-        return self._format_tavily_results(result)
+        return await self._search(f"tourist activities and experiences in {place} verified links", api_key=api_key)
     
     async def tavily_search_transportation(self, place: str, api_key: str = None) -> str:
         """
         Searches for available modes of transportation in and around a given place.
         """
-        tavily_tool = TavilySearch(tavily_api_key=api_key or self.api_key, topic="general", search_depth='advanced')
-        result = await tavily_tool.ainvoke({"query": f"official public transport and taxi guide for {place}"})
-        return self._format_tavily_results(result)
+        return await self._search(f"official public transport and taxi guide for {place}", api_key=api_key)
 
     async def tavily_search_hotels(self, place: str, api_key: str = None) -> str:
         """
         Search for top hotels in and around a given place.
         """
-        tavily_tool = TavilySearch(tavily_api_key=api_key or self.api_key, topic="general", search_depth='advanced')
-        result = await tavily_tool.ainvoke({"query": f"top luxury and boutique hotels in {place} official website booking.com"})
-        return self._format_tavily_results(result)
+        return await self._search(f"top luxury and boutique hotels in {place} official website booking.com", api_key=api_key)
@@ -0,0 +1,240 @@
+import asyncio
+import contextlib
+import contextvars
+import logging
+import random
+import time
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+import httpx
+import requests
+
+from exception.exceptions import DeadlineExceededError, UpstreamUnavailableError
+from utils.concurrency import upstream_limit
+from utils.config_loader import get_config
+from utils.telemetry import span
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_RESILIENCE_SETTINGS = {
+    "request_budget": 120,
+    "timeout": 10,
+    "attempts": 3,
+    "base_delay": 0.25,
+    "max_delay": 2.0,
+    "failure_threshold": 5,
+    "cooldown": 30,
+}
+
+RETRYABLE_STATUS = {408, 425, 429, 500, 502, 503, 504}
+
+# Absolute time.monotonic() by which the current request must finish, if any
+_deadline: contextvars.ContextVar[Optional[float]] = contextvars.ContextVar("request_deadline", default=None)
+
+
+@contextlib.contextmanager
+def deadline_scope(seconds: Optional[float]):
+    """
+    Bound everything awaited inside (including tool calls in graph tasks,
+    which inherit the context) to `seconds` from now. Nested scopes can only
+    shorten the deadline.
+    """
+    current = _deadline.get()
+    deadline = None if seconds is None else time.monotonic() + seconds
+    if current is not None and (deadline is None or current < deadline):
+        deadline = current
+    token = _deadline.set(deadline)
+    try:
+        yield deadline
+    finally:
+        _deadline.reset(token)
+
+
+def current_deadline() -> Optional[float]:
+    return _deadline.get()
+
+
+def remaining_budget() -> Optional[float]:
+    """Seconds left before the request deadline, or None if the request is unbounded."""
+    deadline = _deadline.get()
+    return None if deadline is None else deadline - time.monotonic()
+
+
+def with_deadline(config: Dict[str, Any], seconds: Optional[float]) -> Dict[str, Any]:
+    """
+    Copy of a graph RunnableConfig carrying a deadline `seconds` from now
+    (wall clock, so it means the same thing in every node and tool).
+    """
+    if seconds is None:
+        return config
+    return {**config, "configurable": {**config.get("configurable", {}), "deadline": time.time() + seconds}}
+
+
+def config_budget(config: Optional[Dict[str, Any]]) -> Optional[float]:
+    """Seconds left before the deadline carried in `config`, or None if it has none."""
+    deadline = ((config or {}).get("configurable") or {}).get("deadline")
+    return None if deadline is None else deadline - time.time()
+
+
+def is_retryable(exc: BaseException) -> bool:
+    """Timeouts, connection failures and throttling/5xx responses are worth retrying; client errors are not."""
+    if isinstance(exc, httpx.HTTPStatusError):
+        return exc.response.status_code in RETRYABLE_STATUS
+    return isinstance(exc, (
+        asyncio.TimeoutError, TimeoutError, ConnectionError, httpx.TransportError,
+        requests.ConnectionError, requests.Timeout,  # SerpAPI's client is built on requests
+        UpstreamUnavailableError,  # raised by clients that report failures in their results (Tavily)
+    ))
+
+
+class CircuitBreaker:
+    """
+    Stops calling an upstream after `failure_threshold` consecutive
+    failures. While open, calls fail immediately with
+    UpstreamUnavailableError; after `cooldown` seconds a single trial call
+    is let through (half-open), and its outcome closes or re-opens the circuit.
+    """
+
+    def __init__(self, name: str, failure_threshold: int = 5, cooldown: float = 30):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.cooldown = cooldown
+        self.failures = 0
+        self.opened_at: Optional[float] = None
+        self._trial_in_flight = False
+        self.short_circuits = 0
+
+    @property
+    def state(self) -> str:
+        if self.opened_at is None:
+            return "closed"
+        return "half_open" if time.monotonic() - self.opened_at >= self.cooldown else "open"
+
+    def before_call(self) -> None:
+        state = self.state
+        if state == "closed":
+            return
+        if state == "half_open" and not self._trial_in_flight:
+            self._trial_in_flight = True
+            return
+        self.short_circuits += 1
+        retry_in = max(0.0, self.cooldown - (time.monotonic() - self.opened_at))
+        raise UpstreamUnavailableError(f"{self.name} is temporarily unavailable (retrying in {retry_in:.0f}s).")
+
+    def record_success(self) -> None:
+        self.failures = 0
+        self.opened_at = None
+        self._trial_in_flight = False
+
+    def record_failure(self) -> None:
+        self.failures += 1
+        if self._trial_in_flight or self.failures >= self.failure_threshold:
+            if self.state != "open":
+                logger.warning(f"Circuit for {self.name} opened after {self.failures} consecutive failures")
+            self.opened_at = time.monotonic()
+        self._trial_in_flight = False
+
+    def abandon(self) -> None:
+        """The call was cancelled before an outcome; let another caller make the trial."""
+        self._trial_in_flight = False
+
+    def stats(self) -> Dict[str, Any]:
+        return {"name": self.name, "state": self.state, "failures": self.failures, "short_circuits": self.short_circuits}
+
+
+class UpstreamPolicy:
+    """Timeout, retry and circuit-breaker settings for one upstream."""
+
+    def __init__(self, name: str, timeout: float, attempts: int, base_delay: float, max_delay: float,
+                 failure_threshold: int, cooldown: float):
+        self.name = name
+        self.timeout = timeout
+        self.attempts = max(1, attempts)
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.breaker = CircuitBreaker(name, failure_threshold=failure_threshold, cooldown=cooldown)
+
+    def backoff(self, attempt: int) -> float:
+        # "Full jitter": uniform in [0, min(max_delay, base * 2^attempt)]
+        return random.uniform(0, min(self.max_delay, self.base_delay * (2 ** attempt)))
+
+
+_policies: Dict[str, UpstreamPolicy] = {}
+
+
+def resilience_settings() -> Dict[str, Any]:
+    return {**DEFAULT_RESILIENCE_SETTINGS, **{k: v for k, v in (get_config().get("resilience") or {}).items() if k != "upstreams"}}
+
+
+def upstream_policy(name: str) -> UpstreamPolicy:
+    """Process-wide policy for upstream `name` (config.yaml `resilience`, overridable per upstream)."""
+    policy = _policies.get(name)
+    if policy is None:
+        overrides = ((get_config().get("resilience") or {}).get("upstreams") or {}).get(name) or {}
+        cfg = {**resilience_settings(), **overrides}
+        policy = _policies[name] = UpstreamPolicy(
+            name,
+            timeout=cfg["timeout"],
+            attempts=cfg["attempts"],
+            base_delay=cfg["base_delay"],
+            max_delay=cfg["max_delay"],
+            failure_threshold=cfg["failure_threshold"],
+            cooldown=cfg["cooldown"],
+        )
+    return policy
+
+
+async def call_upstream(name: str, call: Callable[[], Awaitable[Any]], idempotent: bool = True,
+                        limit: Optional[str] = None) -> Any:
+    """
+    Run `call` against upstream `name` with a per-attempt timeout capped by
+    the request deadline, jittered exponential retries (idempotent calls
+    only) and the upstream's circuit breaker. Each attempt holds a slot of
+    the `limit` upstream limiter (defaults to `name`).
+    """
+    policy = upstream_policy(name)
+    attempts = policy.attempts if idempotent else 1
+    with span("upstream", name) as current:
+        for attempt in range(attempts):
+            current.set("attempts", attempt + 1)
+            async with upstream_limit(limit or name):
+                # Measured after the slot is granted: waiting for it uses up the request budget
+                budget = remaining_budget()
+                if budget is not None and budget <= 0:
+                    raise DeadlineExceededError(f"Request deadline reached before calling {name}.")
+                timeout = policy.timeout if budget is None else min(policy.timeout, budget)
+                policy.breaker.before_call()
+                try:
+                    result = await asyncio.wait_for(call(), timeout=timeout)
+                except asyncio.TimeoutError as e:
+                    if timeout < policy.timeout:
+                        # Cut short by the request deadline, not by a slow upstream
+                        policy.breaker.abandon()
+                        raise DeadlineExceededError(f"Request deadline reached while calling {name}.") from e
+                    policy.breaker.record_failure()
+                    error = e
+                except Exception as e:
+                    if is_retryable(e):
+                        policy.breaker.record_failure()
+                    else:
+                        # The upstream answered (e.g. bad key or request); that says nothing about its health
+                        policy.breaker.record_success()
+                        raise
+                    error = e
+                except BaseException:
+                    policy.breaker.abandon()
+                    raise
+                else:
+                    policy.breaker.record_success()
+                    return result
+
+            delay = policy.backoff(attempt)
+            budget = remaining_budget()
+            if attempt + 1 >= attempts or (budget is not None and budget <= delay):
+                raise error
+            logger.info(f"{name} call failed ({type(error).__name__}), retry {attempt + 1}/{attempts - 1} in {delay:.2f}s")
+            await asyncio.sleep(delay)
+
+
+def resilience_stats() -> Dict[str, Dict[str, Any]]:
+    return {name: policy.breaker.stats() for name, policy in _policies.items()}
@@ -0,0 +1,89 @@
+import hashlib
+import json
+import re
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+
+from utils.cache import AsyncTTLCache
+from utils.config_loader import get_config
+from utils.telemetry import record_cache
+
+DEFAULT_RESPONSE_CACHE_SETTINGS = {"enabled": False, "ttl": 21600, "max_entries": 512}
+
+_WHITESPACE = re.compile(r"\s+")
+
+
+def normalize_query(text: str) -> str:
+    """Lowercase, collapse whitespace and drop trailing punctuation so trivially different queries match."""
+    return _WHITESPACE.sub(" ", (text or "").strip().lower()).rstrip(" .!?")
+
+
+def trip_params(num_travelers: Optional[int], travel_month: Optional[str], target_currency: Optional[str],
+                auto_convert: Optional[bool], provider: str) -> Tuple:
+    """Normalized request fields an answer depends on besides the query text."""
+    return (
+        num_travelers,
+        (travel_month or "").strip().lower(),
+        (target_currency or "USD").strip().upper(),
+        bool(auto_convert),
+        provider,
+    )
+
+
+def response_cache_key(query: str, params: Tuple) -> str:
+    return hashlib.sha256(json.dumps([normalize_query(query), *params]).encode("utf-8")).hexdigest()
+
+
+def bypass_requested(*directives: Optional[str]) -> bool:
+    """True if any Cache-Control style directive asks to skip the cache."""
+    tokens = {token.strip().lower() for value in directives if value for token in value.split(",")}
+    return bool(tokens & {"no-cache", "no-store"})
+
+
+class ResponseCache:
+    """
+    Opt-in cache of complete first-turn /query answers.
+
+    Entries live in this worker's memory with a TTL and LRU bound; identical
+    requests arriving together share one agent run. Follow-up turns are
+    never served from the cache because their answer depends on the thread.
+    """
+
+    def __init__(self, enabled: bool = False, ttl: float = 21600, max_entries: int = 512):
+        self.enabled = enabled
+        self.ttl = ttl
+        self.cache = AsyncTTLCache(maxsize=max_entries, ttl=ttl, name="responses")
+
+    @classmethod
+    def from_config(cls) -> "ResponseCache":
+        cfg = {**DEFAULT_RESPONSE_CACHE_SETTINGS, **(get_config().get("response_cache") or {})}
+        return cls(enabled=cfg["enabled"], ttl=cfg["ttl"], max_entries=cfg["max_entries"])
+
+    async def get_or_run(self, key: str, run: Callable[[], Awaitable[Dict[str, Any]]],
+                         should_cache: Callable[[Dict[str, Any]], bool]) -> Tuple[Dict[str, Any], bool]:
+        """
+        Return (response, hit). `hit` is False for the caller whose `run`
+        produced the response, and for callers coalesced onto a run whose
+        response `should_cache` rejected (e.g. the agent's error reply):
+        that is the producer's failure, not a cached answer.
+        """
+        if not self.enabled:
+            return await run(), False
+        ran = False
+
+        async def load():
+            nonlocal ran
+            ran = True
+            return await run()
+
+        response = await self.cache.get_or_set(key, load, should_cache=should_cache)
+        return response, not ran and should_cache(response)
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        response = self.cache.get(key) if self.enabled else None
+        if response is not None:
+            # Misses are counted by get_or_run, which callers fall through to
+            record_cache(self.cache.name, "hit")
+        return response
+
+    def stats(self) -> Dict[str, Any]:
+        return {**self.cache.stats(), "enabled": self.enabled}
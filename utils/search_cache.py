@@ -0,0 +1,208 @@
+import asyncio
+import contextlib
+import logging
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+from utils.cache import normalize_place
+from utils.config_loader import BASE_DIR, get_config
+from utils.telemetry import record_cache
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_SEARCH_CACHE_SETTINGS = {
+    "path": "data/search_cache.sqlite3",
+    "max_entries": 5000,
+    "lease_timeout": 30,
+    "ttl": {
+        "attractions": 7 * 86400,
+        "restaurants": 3 * 86400,
+        "hotels": 3 * 86400,
+        "activities": 7 * 86400,
+        "transportation": 14 * 86400,
+    },
+}
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS search_cache (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL,
+    expires_at REAL NOT NULL,
+    accessed_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS search_cache_accessed ON search_cache (accessed_at);
+CREATE TABLE IF NOT EXISTS search_leases (
+    key TEXT PRIMARY KEY,
+    holder TEXT NOT NULL,
+    expires_at REAL NOT NULL
+);
+"""
+
+
+def search_cache_key(provider: str, kind: str, place: str) -> str:
+    return f"{provider}|{kind}|{normalize_place(place)}"
+
+
+class SearchCache:
+    """
+    Persistent cache for place-search results, stored in SQLite (WAL mode).
+
+    The database file is shared by every gunicorn worker and survives
+    restarts. Size is bounded by evicting least-recently-used rows, and a
+    lease row per key makes sure only one worker fetches a missing entry
+    while the others wait for its result.
+    """
+
+    # Hits refresh `accessed_at` at most this often, to keep reads from turning into writes
+    TOUCH_INTERVAL = 60.0
+    POLL_INTERVAL = 0.1
+
+    def __init__(self, path: str, max_entries: int = 5000, lease_timeout: float = 30.0, ttls: Dict[str, float] = None):
+        self.path = path if os.path.isabs(path) else os.path.join(BASE_DIR, path)
+        self.max_entries = max_entries
+        self.lease_timeout = lease_timeout
+        self.ttls = ttls or {}
+        self.hits = 0
+        self.misses = 0
+        self._local = threading.local()
+        self._inflight: Dict[str, asyncio.Future] = {}
+        self._holder_suffix = uuid.uuid4().hex[:8]
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        # Not kept open: this may run in a gunicorn master (preload_app) whose connections must not reach forked workers
+        with contextlib.closing(sqlite3.connect(self.path, timeout=10)) as conn:
+            conn.executescript(_SCHEMA)
+
+    @property
+    def _holder(self) -> str:
+        # Includes the pid at call time: workers forked from a preloading master share this object
+        return f"{os.getpid()}-{self._holder_suffix}"
+
+    @classmethod
+    def from_config(cls) -> "SearchCache":
+        cfg = {**DEFAULT_SEARCH_CACHE_SETTINGS, **(get_config().get("cache", {}).get("search") or {})}
+        ttls = {**DEFAULT_SEARCH_CACHE_SETTINGS["ttl"], **(cfg.get("ttl") or {})}
+        return cls(cfg["path"], max_entries=cfg["max_entries"], lease_timeout=cfg["lease_timeout"], ttls=ttls)
+
+    def _connection(self) -> sqlite3.Connection:
+        # One connection per worker thread; asyncio.to_thread reuses a small pool of threads
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=10, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def _get(self, key: str) -> Optional[str]:
+        conn = self._connection()
+        now = time.time()
+        row = conn.execute(
+            "SELECT value, accessed_at FROM search_cache WHERE key = ? AND expires_at > ?", (key, now)
+        ).fetchone()
+        if row is None:
+            return None
+        if now - row[1] > self.TOUCH_INTERVAL:
+            conn.execute("UPDATE search_cache SET accessed_at = ? WHERE key = ?", (now, key))
+        return row[0]
+
+    def _set(self, key: str, value: str, ttl: float) -> None:
+        conn = self._connection()
+        now = time.time()
+        conn.execute(
+            "INSERT OR REPLACE INTO search_cache (key, value, expires_at, accessed_at) VALUES (?, ?, ?, ?)",
+            (key, value, now + ttl, now),
+        )
+        self._evict(conn, now)
+
+    def _evict(self, conn: sqlite3.Connection, now: float) -> None:
+        conn.execute("DELETE FROM search_cache WHERE expires_at <= ?", (now,))
+        (count,) = conn.execute("SELECT COUNT(*) FROM search_cache").fetchone()
+        if count > self.max_entries:
+            conn.execute(
+                "DELETE FROM search_cache WHERE key IN "
+                "(SELECT key FROM search_cache ORDER BY accessed_at ASC LIMIT ?)",
+                (count - self.max_entries,),
+            )
+
+    def _try_lease(self, key: str) -> bool:
+        conn = self._connection()
+        now = time.time()
+        conn.execute("DELETE FROM search_leases WHERE key = ? AND expires_at <= ?", (key, now))
+        cursor = conn.execute(
+            "INSERT OR IGNORE INTO search_leases (key, holder, expires_at) VALUES (?, ?, ?)",
+            (key, self._holder, now + self.lease_timeout),
+        )
+        return cursor.rowcount == 1
+
+    def _release_lease(self, key: str) -> None:
+        self._connection().execute("DELETE FROM search_leases WHERE key = ? AND holder = ?", (key, self._holder))
+
+    async def _load(self, key: str, loader: Callable[[], Awaitable[str]], ttl: float,
+                    should_cache: Callable[[str], bool]) -> str:
+        deadline = time.monotonic() + self.lease_timeout
+        while True:
+            if await asyncio.to_thread(self._try_lease, key):
+                try:
+                    # The previous lease holder may have just stored the value
+                    value = await asyncio.to_thread(self._get, key)
+                    if value is None:
+                        value = await loader()
+                        if should_cache(value):
+                            await asyncio.to_thread(self._set, key, value, ttl)
+                    return value
+                finally:
+                    await asyncio.to_thread(self._release_lease, key)
+
+            # Another worker is fetching this key; wait for it rather than stampeding the provider
+            await asyncio.sleep(self.POLL_INTERVAL)
+            value = await asyncio.to_thread(self._get, key)
+            if value is not None:
+                return value
+            if time.monotonic() > deadline:
+                logger.warning(f"Search cache lease for {key} timed out, fetching directly")
+                return await loader()
+
+    async def get_or_set(self, kind: str, key: str, loader: Callable[[], Awaitable[str]],
+                         should_cache: Callable[[str], bool] = lambda value: True) -> str:
+        """
+        Return the cached result for `key`, calling `loader` once across all
+        workers on a miss. Loaded values rejected by `should_cache` are
+        returned but not stored.
+        """
+        value = await asyncio.to_thread(self._get, key)
+        if value is not None:
+            self.hits += 1
+            record_cache("search", "hit")
+            return value
+
+        inflight = self._inflight.get(key)
+        if inflight is not None:
+            self.hits += 1
+            record_cache("search", "coalesced")
+            return await asyncio.shield(inflight)
+
+        self.misses += 1
+        record_cache("search", "miss")
+        task = asyncio.ensure_future(self._load(key, loader, self.ttls.get(kind, 86400), should_cache))
+        self._inflight[key] = task
+        try:
+            return await asyncio.shield(task)
+        finally:
+            if task.done():
+                self._inflight.pop(key, None)
+            else:
+                task.add_done_callback(lambda _: self._inflight.pop(key, None))
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "name": "search",
+            "path": self.path,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": self.hits / lookups if lookups else 0.0,
+        }
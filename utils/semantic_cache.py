@@ -0,0 +1,184 @@
+import re
+import time
+import zlib
+from collections import deque
+from typing import Any, Dict, FrozenSet, Hashable, Optional, Sequence, Tuple
+
+import numpy as np
+
+from utils.config_loader import get_config
+from utils.telemetry import record_cache
+
+DEFAULT_SEMANTIC_CACHE_SETTINGS = {"enabled": False, "threshold": 0.85, "dim": 2048, "max_entries": 2048, "ttl": 21600}
+
+_TOKEN = re.compile(r"[a-z0-9]+")
+
+NUMBER_WORDS = {
+    "one": "1", "two": "2", "three": "3", "four": "4", "five": "5", "six": "6", "seven": "7",
+    "eight": "8", "nine": "9", "ten": "10", "eleven": "11", "twelve": "12", "fourteen": "14", "single": "1",
+}
+
+# Words that carry no information about which plan is wanted
+STOPWORDS = frozenset(
+    "a an the to in for of on at with and or me my us our i we please plan planning trip travel itinerary "
+    "make create give suggest want need would like can could some visit visiting going go holiday vacation "
+    "day days night nights".split()
+)
+
+
+def query_terms(text: str) -> Tuple[Sequence[str], FrozenSet[str]]:
+    """Normalized content words of a query, and the set of numbers it mentions."""
+    terms, numbers = [], set()
+    for token in _TOKEN.findall((text or "").lower()):
+        token = NUMBER_WORDS.get(token, token)
+        if token.isdigit():
+            # Numbers are matched exactly through the partition key instead
+            numbers.add(token)
+            continue
+        if token in STOPWORDS:
+            continue
+        elif len(token) > 3 and token.endswith("s") and not token.endswith("ss"):
+            token = token[:-1]
+        terms.append(token)
+    return terms, frozenset(numbers)
+
+
+class HashedNgramEmbedder:
+    """
+    Dependency-free text embedding: word unigrams, bigrams and character
+    trigrams hashed into a fixed number of signed buckets, L2-normalized.
+    """
+
+    def __init__(self, dim: int = 2048):
+        self.dim = dim
+
+    def _add(self, vector: np.ndarray, feature: str, weight: float) -> None:
+        h = zlib.crc32(feature.encode("utf-8"))
+        vector[h % self.dim] += weight if h & 0x80000000 else -weight
+
+    def embed_terms(self, terms: Sequence[str]) -> np.ndarray:
+        vector = np.zeros(self.dim, dtype=np.float32)
+        for i, term in enumerate(terms):
+            self._add(vector, f"w:{term}", 1.0)
+            if i:
+                self._add(vector, f"b:{terms[i - 1]} {term}", 0.5)
+            padded = f"<{term}>"
+            for j in range(len(padded) - 2):
+                self._add(vector, f"c:{padded[j:j + 3]}", 0.25)
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
+
+    def embed(self, text: str) -> np.ndarray:
+        return self.embed_terms(query_terms(text)[0])
+
+
+class _Partition:
+    """Vectors and payloads sharing the same hard-filter values."""
+
+    def __init__(self, dim: int):
+        self.vectors = np.zeros((0, dim), dtype=np.float32)
+        self.entries: list = []  # [(entry_id, expires_at, payload)] aligned with rows of `vectors`
+
+    def add(self, entry_id: int, vector: np.ndarray, expires_at: float, payload: Any) -> None:
+        self.vectors = np.vstack([self.vectors, vector[None, :]])
+        self.entries.append((entry_id, expires_at, payload))
+
+    def remove(self, entry_id: int) -> None:
+        for row, entry in enumerate(self.entries):
+            if entry[0] == entry_id:
+                self.vectors = np.delete(self.vectors, row, axis=0)
+                del self.entries[row]
+                return
+
+
+class SemanticCache:
+    """
+    Near-duplicate lookup for first-turn answers.
+
+    Queries are embedded with HashedNgramEmbedder and searched by cosine
+    similarity within a partition keyed by the trip parameters (travelers,
+    month, currency, ...) plus the numbers mentioned in the query, so
+    "5 days in Bali" never matches "3 days in Bali" or a different party
+    size. Entries expire after `ttl` and the oldest are evicted beyond
+    `max_entries`.
+    """
+
+    def __init__(self, enabled: bool = False, threshold: float = 0.85, dim: int = 2048,
+                 max_entries: int = 2048, ttl: float = 21600):
+        self.enabled = enabled
+        self.threshold = threshold
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.embedder = HashedNgramEmbedder(dim)
+        self._partitions: Dict[Hashable, _Partition] = {}
+        self._order: "deque[Tuple[Hashable, int]]" = deque()
+        self._next_id = 0
+        self.hits = 0
+        self.misses = 0
+
+    @classmethod
+    def from_config(cls) -> "SemanticCache":
+        cfg = {**DEFAULT_SEMANTIC_CACHE_SETTINGS, **(get_config().get("semantic_cache") or {})}
+        return cls(enabled=cfg["enabled"], threshold=cfg["threshold"], dim=cfg["dim"],
+                   max_entries=cfg["max_entries"], ttl=cfg["ttl"])
+
+    def __len__(self) -> int:
+        return len(self._order)
+
+    def _prepare(self, text: str, filters: Hashable) -> Tuple[Hashable, np.ndarray]:
+        terms, numbers = query_terms(text)
+        return (filters, numbers), self.embedder.embed_terms(terms)
+
+    def lookup(self, text: str, filters: Hashable) -> Optional[Tuple[Any, float]]:
+        """Return (payload, similarity) of the closest live entry above the threshold, else None."""
+        partition_key, vector = self._prepare(text, filters)
+        partition = self._partitions.get(partition_key)
+        if partition is not None and partition.entries:
+            scores = partition.vectors @ vector
+            now = time.monotonic()
+            for row in np.argsort(-scores):
+                if scores[row] < self.threshold:
+                    break
+                _, expires_at, payload = partition.entries[row]
+                if expires_at > now:
+                    self.hits += 1
+                    record_cache("semantic", "hit")
+                    return payload, float(scores[row])
+        self.misses += 1
+        record_cache("semantic", "miss")
+        return None
+
+    def add(self, text: str, filters: Hashable, payload: Any) -> None:
+        partition_key, vector = self._prepare(text, filters)
+        if not vector.any():
+            return
+        partition = self._partitions.setdefault(partition_key, _Partition(self.embedder.dim))
+        entry_id, self._next_id = self._next_id, self._next_id + 1
+        partition.add(entry_id, vector, time.monotonic() + self.ttl, payload)
+        self._order.append((partition_key, entry_id))
+        while len(self._order) > self.max_entries:
+            self._evict(*self._order.popleft())
+
+    def _evict(self, partition_key: Hashable, entry_id: int) -> None:
+        partition = self._partitions.get(partition_key)
+        if partition is None:
+            return
+        partition.remove(entry_id)
+        if not partition.entries:
+            del self._partitions[partition_key]
+
+    def clear(self) -> None:
+        self._partitions.clear()
+        self._order.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "name": "semantic",
+            "enabled": self.enabled,
+            "size": len(self),
+            "partitions": len(self._partitions),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": self.hits / lookups if lookups else 0.0,
+        }
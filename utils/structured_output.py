@@ -0,0 +1,103 @@
+import json
+import logging
+from typing import Any, Dict, List, Optional, Tuple
+
+from pydantic import BaseModel, ConfigDict, Field, ValidationError
+
+logger = logging.getLogger(__name__)
+
+JSON_FENCE = "```json"
+FENCE = "```"
+
+
+class ItineraryDay(BaseModel):
+    model_config = ConfigDict(extra="allow")
+
+    day: Optional[int] = None
+    title: Optional[str] = None
+    activities: List[Any] = Field(default_factory=list)
+    estimated_cost: Optional[float] = None
+
+
+class ItineraryPayload(BaseModel):
+    """Machine-readable trip summary the agent may append to its answer as a fenced ```json block."""
+    model_config = ConfigDict(extra="allow")
+
+    destination: Optional[str] = None
+    duration_days: Optional[int] = None
+    num_travelers: Optional[int] = None
+    currency: Optional[str] = None
+    total_estimated_cost: Optional[float] = None
+    days: List[ItineraryDay] = Field(default_factory=list)
+    markdown: Optional[str] = None
+
+
+def split_trailing_json(text: str) -> Tuple[str, Optional[str]]:
+    """
+    Split the last fenced ```json block off `text`.
+
+    Scans backwards from the end of the text, so only the tail of a long
+    answer is touched. Returns the text without the block and the raw
+    JSON (None when there is no complete block).
+    """
+    start = text.rfind(JSON_FENCE)
+    if start == -1:
+        return text, None
+    end = text.find(FENCE, start + len(JSON_FENCE))
+    if end == -1:
+        return text, None
+    raw = text[start + len(JSON_FENCE):end].strip()
+    return (text[:start] + text[end + len(FENCE):]).strip(), raw
+
+
+def parse_structured_output(text: str) -> Tuple[str, Optional[Dict[str, Any]]]:
+    """Return the user-facing Markdown and the validated itinerary payload, if the answer carries one."""
+    body, raw = split_trailing_json(text)
+    if raw is None:
+        return text, None
+    try:
+        payload = ItineraryPayload.model_validate(json.loads(raw))
+    except (ValueError, ValidationError) as e:
+        logger.info(f"Ignoring structured output that does not match the itinerary schema: {e}")
+        return body, None
+    return body, payload.model_dump(exclude_unset=True)
+
+
+class JsonBlockFilter:
+    """
+    Incrementally hides fenced ```json blocks from a token stream.
+
+    `feed` returns the text that is safe to show; a few trailing characters
+    are held back while they could still be the start of a fence.
+    """
+
+    def __init__(self):
+        self._buffer = ""
+        self._in_block = False
+
+    def feed(self, chunk: str) -> str:
+        self._buffer += chunk
+        visible = ""
+        while True:
+            fence = FENCE if self._in_block else JSON_FENCE
+            index = self._buffer.find(fence)
+            if index == -1:
+                break
+            if not self._in_block:
+                visible += self._buffer[:index]
+            self._buffer = self._buffer[index + len(fence):]
+            self._in_block = not self._in_block
+
+        fence = FENCE if self._in_block else JSON_FENCE
+        keep = next((n for n in range(min(len(fence) - 1, len(self._buffer)), 0, -1)
+                     if fence.startswith(self._buffer[-n:])), 0)
+        if not self._in_block:
+            visible += self._buffer[:len(self._buffer) - keep]
+        self._buffer = self._buffer[len(self._buffer) - keep:]
+        return visible
+
+    def flush(self) -> str:
+        """Release any held-back text once the stream has ended."""
+        visible = "" if self._in_block else self._buffer
+        self._buffer = ""
+        return visible
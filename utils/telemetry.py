@@ -0,0 +1,207 @@
+import contextvars
+import functools
+import threading
+import time
+from collections import defaultdict
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from utils.config_loader import get_config
+
+try:
+    from opentelemetry import trace as otel_trace
+except ImportError:
+    otel_trace = None
+
+DEFAULT_TELEMETRY_SETTINGS = {
+    "enabled": True,
+    "otel": True,
+    "buckets": [0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120],
+}
+
+# Every operation histogram series carries these labels ("" when not applicable)
+LABELS = ("kind", "name", "provider", "cache", "status")
+
+_current: contextvars.ContextVar[Optional["Span"]] = contextvars.ContextVar("telemetry_span", default=None)
+
+
+class Histogram:
+    """Cumulative Prometheus-style histogram keyed by a fixed label tuple."""
+
+    def __init__(self, buckets):
+        self.buckets = tuple(sorted(buckets))
+        self._series: Dict[Tuple[str, ...], list] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, labels: Tuple[str, ...], value: float) -> None:
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                # [per-bucket counts..., +Inf count, sum]
+                series = self._series[labels] = [0] * (len(self.buckets) + 1) + [0.0]
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series[i] += 1
+                    break
+            else:
+                series[len(self.buckets)] += 1
+            series[-1] += value
+
+    def series(self):
+        with self._lock:
+            return [(labels, list(values)) for labels, values in self._series.items()]
+
+
+class Span:
+    """
+    One timed operation. Attributes can be added while it runs; on exit its
+    duration goes to the operation histogram and, when OpenTelemetry is
+    installed, it is also recorded as an OTel span.
+    """
+
+    __slots__ = ("telemetry", "kind", "name", "attributes", "_start", "_otel", "_otel_span", "_token")
+
+    def __init__(self, telemetry: "Telemetry", kind: str, name: str, attributes: Dict[str, Any]):
+        self.telemetry = telemetry
+        self.kind = kind
+        self.name = name
+        self.attributes = attributes
+        self._otel = None
+
+    def set(self, key: str, value: Any) -> None:
+        self.attributes[key] = value
+
+    def set_cache(self, result: str) -> None:
+        """Tag the cache outcome; an operation with several lookups that disagree is "mixed"."""
+        previous = self.attributes.get("cache")
+        self.attributes["cache"] = result if previous in (None, result) else "mixed"
+
+    def __enter__(self) -> "Span":
+        if self.telemetry.tracer is not None:
+            self._otel = self.telemetry.tracer.start_as_current_span(f"{self.kind} {self.name}")
+            self._otel_span = self._otel.__enter__()
+        self._token = _current.set(self)
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        duration = time.perf_counter() - self._start
+        _current.reset(self._token)
+        status = "ok" if exc_type is None else "error"
+        attrs = self.attributes
+        self.telemetry.operations.observe(
+            (self.kind, self.name, str(attrs.get("provider", "")), str(attrs.get("cache", "")), status), duration
+        )
+        if self._otel is not None:
+            self._otel_span.set_attributes({"kind": self.kind, "status": status, **{k: str(v) for k, v in attrs.items()}})
+            self._otel.__exit__(exc_type, exc, tb)
+
+
+class _NoopSpan:
+    """Returned when telemetry is disabled, so instrumented code pays only a function call."""
+
+    def set(self, key: str, value: Any) -> None:
+        pass
+
+    def set_cache(self, result: str) -> None:
+        pass
+
+    def __enter__(self) -> "_NoopSpan":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        pass
+
+
+NOOP_SPAN = _NoopSpan()
+
+
+class Telemetry:
+    """
+    Per-worker operation timings (graph nodes, tools, upstream calls) and
+    cache hit/miss counters, rendered in the Prometheus text format by
+    `render()`. Each gunicorn worker keeps its own numbers.
+    """
+
+    def __init__(self, enabled: bool = True, otel: bool = True, buckets=None):
+        self.enabled = enabled
+        self.operations = Histogram(buckets or DEFAULT_TELEMETRY_SETTINGS["buckets"])
+        self.cache_results: Dict[Tuple[str, str], int] = defaultdict(int)
+        # Spans go to whatever exporter the OpenTelemetry SDK was configured with (no-op without an SDK)
+        self.tracer = otel_trace.get_tracer("getsetgo") if enabled and otel and otel_trace is not None else None
+
+    @classmethod
+    def from_config(cls) -> "Telemetry":
+        cfg = {**DEFAULT_TELEMETRY_SETTINGS, **(get_config().get("telemetry") or {})}
+        return cls(enabled=cfg["enabled"], otel=cfg["otel"], buckets=cfg["buckets"])
+
+    def span(self, kind: str, name: str, **attributes: Any):
+        if not self.enabled:
+            return NOOP_SPAN
+        return Span(self, kind, name, attributes)
+
+    def record_cache(self, cache: str, result: str) -> None:
+        if not self.enabled:
+            return
+        self.cache_results[(cache, result)] += 1
+        span = _current.get()
+        if span is not None:
+            span.set_cache(result)
+
+    def render(self) -> str:
+        lines = [
+            "# HELP getsetgo_operation_duration_seconds Duration of graph nodes, tool calls and upstream API calls.",
+            "# TYPE getsetgo_operation_duration_seconds histogram",
+        ]
+        bounds = [_format_bound(b) for b in self.operations.buckets] + ["+Inf"]
+        for labels, values in sorted(self.operations.series()):
+            label_text = ",".join(f'{key}="{_escape(value)}"' for key, value in zip(LABELS, labels))
+            cumulative = 0
+            for bound, count in zip(bounds, values[:-1]):
+                cumulative += count
+                lines.append(f'getsetgo_operation_duration_seconds_bucket{{{label_text},le="{bound}"}} {cumulative}')
+            lines.append(f"getsetgo_operation_duration_seconds_sum{{{label_text}}} {values[-1]:.6f}")
+            lines.append(f"getsetgo_operation_duration_seconds_count{{{label_text}}} {cumulative}")
+        lines += [
+            "# HELP getsetgo_cache_requests_total Cache lookups by cache and result (hit, miss, coalesced).",
+            "# TYPE getsetgo_cache_requests_total counter",
+        ]
+        for (cache, result), count in sorted(self.cache_results.items()):
+            lines.append(f'getsetgo_cache_requests_total{{cache="{_escape(cache)}",result="{result}"}} {count}')
+        return "\n".join(lines) + "\n"
+
+
+def _format_bound(bound: float) -> str:
+    return repr(float(bound))
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+telemetry = Telemetry.from_config()
+
+
+def span(kind: str, name: str, **attributes: Any):
+    """`with span("upstream", "tavily", provider="tavily"):` times the block; a no-op when telemetry is disabled."""
+    return telemetry.span(kind, name, **attributes)
+
+
+def current_span():
+    """The innermost active span (a no-op span outside any), for adding attributes."""
+    return _current.get() or NOOP_SPAN
+
+
+def record_cache(cache: str, result: str) -> None:
+    """Count a cache lookup and tag the enclosing span with its outcome."""
+    telemetry.record_cache(cache, result)
+
+
+def traced(kind: str, name: Optional[str] = None, **attributes: Any) -> Callable:
+    """Decorator form of `span` for coroutine functions; keeps the signature visible to LangChain/LangGraph."""
+    def decorate(func):
+        @functools.wraps(func)
+        async def wrapper(*args, **kwargs):
+            with telemetry.span(kind, name or func.__name__, **attributes):
+                return await func(*args, **kwargs)
+        return wrapper
+    return decorate
@@ -1,10 +1,52 @@
-import httpx
-import os
+from utils.cache import AsyncTTLCache, normalize_place
+from utils.config_loader import get_config, get_env
+from utils.resilience import call_upstream
+from utils.http_client import get_http_client, upstream_url
+
+# OpenWeatherMap refreshes current conditions roughly every 10 minutes and forecasts every 3 hours
+DEFAULT_CACHE_SETTINGS = {"max_entries": 1024, "current_ttl": 600, "forecast_ttl": 10800}
 
 class WeatherInfoTool:
     def __init__(self, api_key: str = None):
-        self.api_key = api_key or os.getenv("WEATHER_API_KEY")
-        self.base_url = "http://api.openweathermap.org/data/2.5/"
+        self.api_key = api_key or get_env("WEATHER_API_KEY")
+        self.base_url = f"{upstream_url('openweathermap')}/"
+        cache_cfg = {**DEFAULT_CACHE_SETTINGS, **(get_config().get("cache", {}).get("weather") or {})}
+        self.current_ttl = cache_cfg["current_ttl"]
+        self.forecast_ttl = cache_cfg["forecast_ttl"]
+        self.cache = AsyncTTLCache(maxsize=cache_cfg["max_entries"], name="weather")
+
+    async def _request(self, endpoint: str, params: dict) -> dict:
+        client = get_http_client()
+
+        async def fetch() -> dict:
+            response = await client.get(f"{self.base_url}{endpoint}", params=params)
+            response.raise_for_status()
+            return response.json()
+
+        # Deadline-capped timeout, retries on 429/5xx and a circuit breaker (utils/resilience.py)
+        return await call_upstream("openweathermap", fetch)
+
+    async def _cached_request(self, endpoint: str, city: str, params: dict, ttl: float) -> dict:
+        """Serve `endpoint` for `city` from the cache, fetching once on a miss."""
+        data = await self.cache.get_or_set(
+            (endpoint, normalize_place(city)),
+            lambda: self._request(endpoint, params),
+            ttl=ttl,
+        )
+        # Also index the result under the name OpenWeatherMap resolved, so
+        # "paris" and "Paris, FR" end up sharing one entry
+        place = data.get("city", data) if endpoint == "forecast" else data
+        resolved = place.get("name")
+        country = (place.get("sys") or {}).get("country") or place.get("country")
+        if resolved and country:
+            alias = (endpoint, normalize_place(f"{resolved},{country}"))
+            if self.cache.get(alias) is None:
+                self.cache.set(alias, data, ttl)
+        return data
+
+    def cache_stats(self) -> dict:
+        """Hit/miss counters for the weather cache."""
+        return self.cache.stats()
 
     async def get_weather(self, city: str, api_key: str = None):
         try:
@@ -13,10 +55,7 @@ class WeatherInfoTool:
                 "q": city,
                 "units": "metric"
             }
-            async with httpx.AsyncClient() as client:
-                response = await client.get(f"{self.base_url}weather", params=params)
-                response.raise_for_status()
-                return response.json()
+            return await self._cached_request("weather", city, params, self.current_ttl)
         except Exception as e:
             return {"error": str(e)}
 
@@ -28,9 +67,6 @@ class WeatherInfoTool:
                 "cnt": 40,  # 5 days * 8 (3-hour intervals)
                 "units": "metric"
             }
-            async with httpx.AsyncClient() as client:
-                response = await client.get(f"{self.base_url}forecast", params=params)
-                response.raise_for_status()
-                return response.json()
+            return await self._cached_request("forecast", city, params, self.forecast_ttl)
         except Exception as e:
             return {"error": str(e)}